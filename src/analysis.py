@@ -1,6 +1,5 @@
 import logging
 import pandas as pd
-from ydata_profiling import ProfileReport
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
@@ -12,6 +11,10 @@ def generate_profiling_report(df: pd.DataFrame, output_file: str):
     if df.empty:
         logger.warning("DataFrame vacío. No se puede generar el reporte de profiling.")
         return
+
+    # Importación diferida: ydata_profiling carga matplotlib, scipy y otras dependencias pesadas
+    from ydata_profiling import ProfileReport
+
     profile = ProfileReport(df, title="TV Shows Profiling Report", explorative=True)
     profile.to_file(output_file)
     logger.info(f"Reporte de profiling generado: {output_file}")
@@ -0,0 +1,274 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+import requests
+
+logger = logging.getLogger(__name__)
+
+API_ROOT = "http://api.tvmaze.com"
+SHOW_URL = f"{API_ROOT}/shows/{{show_id}}?embed[]=cast&embed[]=seasons"
+UPDATES_URL = f"{API_ROOT}/updates/shows"
+
+# Ventanas que admite /updates/shows y su duración en segundos
+UPDATES_WINDOWS = {"day": 86400, "week": 7 * 86400, "month": 30 * 86400}
+
+DEFAULT_TTL_SECONDS = 86400
+DEFAULT_MAX_WORKERS = 4
+MAX_RETRIES = 5
+# Ventana del límite de peticiones de TVMaze: tras un 429 se espera al menos este tiempo
+RATE_LIMIT_WINDOW_SECONDS = 10
+
+# Resultado de fetch_show para un show que no existe en TVMaze (404)
+SHOW_NOT_FOUND = object()
+
+
+class ShowEntityStore:
+    """
+    Almacén local clave-valor (SQLite) de shows completos de TVMaze.
+    Cada entrada guarda el JSON del show, su marca 'updated' según TVMaze y
+    el momento en que se obtuvo o se verificó por última vez (fetched_at). Los shows que
+    TVMaze no encuentra (404) se guardan como entradas negativas, sin payload ni 'updated',
+    para no volver a pedirlos hasta que venza el TTL.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS show_entities (
+            id INTEGER PRIMARY KEY,
+            updated INTEGER,
+            fetched_at REAL,
+            payload TEXT
+        )
+        ''')
+        self.conn.commit()
+
+    def get_many(self, show_ids: Iterable[int]) -> Dict[int, dict]:
+        """Retorna los shows almacenados para los ids recibidos (sin las entradas negativas)"""
+        return {show_id: json.loads(payload)
+                for show_id, payload in self._select(show_ids, "id, payload") if payload is not None}
+
+    def get_metadata(self, show_ids: Iterable[int]) -> Dict[int, tuple]:
+        """Retorna (updated, fetched_at) de los shows almacenados para los ids recibidos"""
+        return {show_id: (updated, fetched_at)
+                for show_id, updated, fetched_at in self._select(show_ids, "id, updated, fetched_at")}
+
+    def put_many(self, shows: Iterable[dict], fetched_at: Optional[float] = None):
+        """Inserta o reemplaza shows completos en una sola transacción"""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO show_entities (id, updated, fetched_at, payload) VALUES (?, ?, ?, ?)",
+                [(show["id"], show.get("updated"), fetched_at, json.dumps(show, ensure_ascii=False))
+                 for show in shows]
+            )
+
+    def put_missing(self, show_ids: Iterable[int], fetched_at: Optional[float] = None):
+        """
+        Registra entradas negativas para los shows que TVMaze no encuentra (404). Si el show ya
+        estaba almacenado se conserva su payload y solo se actualiza fetched_at.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO show_entities (id, updated, fetched_at, payload) VALUES (?, NULL, ?, NULL) "
+                "ON CONFLICT(id) DO UPDATE SET fetched_at = excluded.fetched_at",
+                [(show_id, fetched_at) for show_id in show_ids]
+            )
+
+    def touch(self, show_ids: Iterable[int], fetched_at: Optional[float] = None):
+        """Marca como verificados (vigentes) los shows recibidos sin volver a descargarlos"""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self.conn:
+            self.conn.executemany("UPDATE show_entities SET fetched_at = ? WHERE id = ?",
+                                  [(fetched_at, show_id) for show_id in show_ids])
+
+    def close(self):
+        self.conn.close()
+
+    def _select(self, show_ids, columns):
+        show_ids = list(show_ids)
+        rows = []
+        # SQLite limita la cantidad de parámetros por consulta; se consulta por bloques
+        for start in range(0, len(show_ids), 500):
+            block = show_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(block))
+            rows.extend(self.conn.execute(
+                f"SELECT {columns} FROM show_entities WHERE id IN ({placeholders})", block))
+        return rows
+
+
+def get_distinct_show_ids(df: pd.DataFrame) -> list:
+    """
+    Retorna los ids de show distintos (_embedded.show.id) presentes en el DataFrame transformado.
+    """
+    if df.empty or '_embedded.show.id' not in df.columns:
+        return []
+    return sorted(int(show_id) for show_id in df['_embedded.show.id'].dropna().unique())
+
+
+def get_retry_wait(response, attempt: int) -> float:
+    """
+    Segundos a esperar tras un 429: el encabezado Retry-After si la API lo envía y, como
+    mínimo, la ventana del límite de peticiones, creciendo con cada intento.
+    """
+    try:
+        retry_after = float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        retry_after = 0
+    return max(retry_after, RATE_LIMIT_WINDOW_SECONDS * (attempt + 1))
+
+
+def fetch_show(show_id: int):
+    """
+    Obtiene un show completo de la API de TVMaze, incluyendo su reparto y temporadas.
+    Ante un 429 (límite de peticiones excedido) espera lo que indique Retry-After o la
+    ventana del límite; ante timeouts, errores de conexión o 5xx reintenta con espera
+    exponencial. Retorna SHOW_NOT_FOUND si el show no existe (404) y None si no se pudo
+    obtener, en cuyo caso no se guarda nada y se vuelve a pedir en la siguiente ejecución.
+    """
+    url = SHOW_URL.format(show_id=show_id)
+    for attempt in range(MAX_RETRIES):
+        last_attempt = attempt == MAX_RETRIES - 1
+        try:
+            response = requests.get(url, timeout=50)
+            if response.status_code == 404:
+                logger.debug(f"El show {show_id} no existe en TVMaze")
+                return SHOW_NOT_FOUND
+            if response.status_code == 429:
+                # Tras el último intento no tiene sentido esperar
+                if not last_attempt:
+                    wait = get_retry_wait(response, attempt)
+                    logger.debug(f"Límite de peticiones alcanzado para show {show_id}, reintentando en {wait} s...")
+                    time.sleep(wait)
+                continue
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            status_code = getattr(e.response, "status_code", None)
+            if status_code is not None and status_code < 500:
+                logger.error(f"Error al obtener el show {show_id}: {e}")
+                return None
+            logger.debug(f"Error transitorio al obtener el show {show_id}: {e}")
+            if not last_attempt:
+                time.sleep(2 ** attempt)
+    logger.error(f"No fue posible obtener el show {show_id} tras {MAX_RETRIES} intentos")
+    return None
+
+
+def fetch_show_updates(since: str = "week") -> Dict[int, int]:
+    """
+    Obtiene desde /updates/shows la marca 'updated' de los shows modificados en la ventana indicada.
+    """
+    try:
+        response = requests.get(f"{UPDATES_URL}?since={since}", timeout=50)
+        response.raise_for_status()
+        return {int(show_id): updated for show_id, updated in response.json().items()}
+    except requests.RequestException as e:
+        logger.error(f"Error al obtener las actualizaciones de shows: {e}")
+        return {}
+
+
+def find_shows_to_fetch(store: ShowEntityStore, show_ids: list, ttl: float,
+                        since: str = "week", now: Optional[float] = None) -> list:
+    """
+    Determina qué shows deben descargarse: los que no están en el almacén y los vencidos
+    (más antiguos que el TTL) que cambiaron según /updates/shows o que son más antiguos que
+    la ventana del feed. Las entradas negativas vencidas se vuelven a pedir siempre, ya que
+    el feed no informa de los shows que fallaron. Los vencidos sin cambios se marcan como verificados.
+    """
+    now = time.time() if now is None else now
+    metadata = store.get_metadata(show_ids)
+    missing = [show_id for show_id in show_ids if show_id not in metadata]
+    expired = {show_id: meta for show_id, meta in metadata.items() if now - meta[1] > ttl}
+
+    # Entradas negativas (sin 'updated'): se reintentan al vencer, sin consultar el feed
+    retry = sorted(show_id for show_id, (updated, _) in expired.items() if updated is None)
+    expired = {show_id: meta for show_id, meta in expired.items() if meta[0] is not None}
+
+    if not expired:
+        return missing + retry
+
+    # Una sola petición al feed de actualizaciones valida todos los shows vencidos
+    updates = fetch_show_updates(since)
+    window = UPDATES_WINDOWS[since]
+    stale, unchanged = [], []
+    for show_id, (updated, fetched_at) in expired.items():
+        if not updates or now - fetched_at > window or updates.get(show_id, 0) > updated:
+            stale.append(show_id)
+        else:
+            unchanged.append(show_id)
+
+    store.touch(unchanged, now)
+    logger.info(f"Shows vencidos: {len(expired)} (modificados: {len(stale)}, sin cambios: {len(unchanged)})")
+    return missing + sorted(stale) + retry
+
+
+def enrich_shows(df: pd.DataFrame, store_path: str, ttl: float = DEFAULT_TTL_SECONDS,
+                 max_workers: int = DEFAULT_MAX_WORKERS, since: str = "week") -> Dict[int, dict]:
+    """
+    Enriquece los shows del DataFrame transformado con su información completa (reparto,
+    temporadas y metadatos). Solo se descargan, de forma concurrente con un número acotado
+    de hilos, los shows ausentes o modificados; el resto se lee del almacén local.
+    """
+    show_ids = get_distinct_show_ids(df)
+    if not show_ids:
+        logger.warning("No hay shows para enriquecer.")
+        return {}
+
+    store = ShowEntityStore(store_path)
+    try:
+        to_fetch = find_shows_to_fetch(store, show_ids, ttl, since)
+        logger.info(f"Shows distintos: {len(show_ids)}. Shows a descargar: {len(to_fetch)}")
+
+        fetched, not_found, failed = [], [], 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch_show, show_id): show_id for show_id in to_fetch}
+            for future in as_completed(futures):
+                show = future.result()
+                if show is SHOW_NOT_FOUND:
+                    not_found.append(futures[future])
+                elif show:
+                    fetched.append(show)
+                else:
+                    failed += 1
+
+        # La escritura se hace desde el hilo principal, en una sola transacción por tipo de entrada
+        store.put_many(fetched)
+        store.put_missing(not_found)
+        if not_found:
+            logger.warning(f"Shows inexistentes en TVMaze: {len(not_found)} (no se volverán a pedir hasta que venza el TTL)")
+        if failed:
+            logger.warning(f"Shows no obtenidos por errores de la API: {failed} (se reintentarán en la siguiente ejecución)")
+        return store.get_many(show_ids)
+    finally:
+        store.close()
+
+
+def build_enrichment_dataframe(shows: Dict[int, dict]) -> pd.DataFrame:
+    """
+    Construye un DataFrame con los metadatos de cada show y el resumen de su reparto y temporadas.
+    """
+    rows = []
+    for show in shows.values():
+        embedded = show.get("_embedded") or {}
+        cast = embedded.get("cast") or []
+        seasons = embedded.get("seasons") or []
+        row = {key: value for key, value in show.items() if key not in ("_embedded", "_links")}
+        row["cast_count"] = len(cast)
+        row["cast"] = ', '.join(member.get("person", {}).get("name", "") for member in cast)
+        row["season_count"] = len(seasons)
+        rows.append(row)
+
+    df = pd.json_normalize(rows, sep='.')
+    df.columns = [col.lower() for col in df.columns]
+    return df
@@ -2,34 +2,202 @@ import os
 import requests
 import json
 from datetime import date
+from typing import Iterable, Iterator, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-BASE_URL = "http://api.tvmaze.com/schedule/web"
+API_ROOT = "http://api.tvmaze.com"
+BASE_URL = f"{API_ROOT}/schedule/web"
 
-def fetch_tvmaze_schedule(day: date):
+# Endpoints de programación soportados. Cada registro extraído se etiqueta con la
+# clave del endpoint en el campo '_source'.
+SCHEDULE_ENDPOINTS = {
+    "web": "/schedule/web",       # Episodios de canales web/streaming por día
+    "network": "/schedule",       # Episodios de cadenas de TV por país y día
+    "full": "/schedule/full",     # Toda la programación futura en una sola respuesta
+}
+
+SOURCE_FIELD = "_source"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def build_schedule_url(endpoint: str = "web", day: Optional[date] = None, country: Optional[str] = None) -> str:
+    """
+    Construye la URL de la API de TVMaze para el endpoint de programación indicado.
+    """
+    if endpoint not in SCHEDULE_ENDPOINTS:
+        raise ValueError(f"Endpoint no soportado: {endpoint}. Opciones: {list(SCHEDULE_ENDPOINTS)}")
+
+    url = f"{API_ROOT}{SCHEDULE_ENDPOINTS[endpoint]}"
+    params = []
+    if endpoint == "network" and country:
+        params.append(f"country={country}")
+    if endpoint != "full" and day is not None:
+        params.append(f"date={day.isoformat()}")
+    if params:
+        url = f"{url}?{'&'.join(params)}"
+    return url
+
+def tag_record(record: dict, source: str) -> dict:
+    """
+    Etiqueta un registro con su origen y unifica su estructura.
+    El endpoint /schedule (cadenas de TV) entrega el show en la clave 'show', mientras que
+    /schedule/web y /schedule/full lo entregan en '_embedded.show'; se mueve a '_embedded.show'
+    para que transformación y carga traten ambos casos por igual.
     """
-    Realiza una petición GET a la API de TVMaze para obtener los episodios que se emiten 
-    en los canales web/streaming en una fecha determinada.
+    if "show" in record and "_embedded" not in record:
+        record["_embedded"] = {"show": record.pop("show")}
+    record[SOURCE_FIELD] = source
+    return record
+
+def fetch_tvmaze_schedule(day: date, endpoint: str = "web", country: Optional[str] = None,
+                          raise_errors: bool = False):
     """
-    url = f"{BASE_URL}?date={day.isoformat()}"
+    Realiza una petición GET a la API de TVMaze para obtener los episodios que se emiten
+    en una fecha determinada. Por defecto consulta los canales web/streaming; con
+    endpoint="network" consulta las cadenas de TV del país indicado.
+    Ante un error retorna una lista vacía o, con raise_errors, relanza la excepción para
+    que el consumidor distinga un día sin episodios de una petición fallida.
+    """
+    url = build_schedule_url(endpoint, day, country)
     logger.debug(f"Llamando a URL: {url}")
     try:
         response = requests.get(url, timeout=50)
         response.raise_for_status()
-        return response.json()
+        return [tag_record(record, endpoint) for record in response.json()]
     except requests.RequestException as e:
         logger.error(f"Error al llamar a la API: {e}")
+        if raise_errors:
+            raise
         return []
 
-def save_json_response(data, folder_path: str, day: date):
+def iter_json_array(chunks: Iterable) -> Iterator:
+    """
+    Decodifica de forma incremental un arreglo JSON recibido por fragmentos, retornando
+    un elemento a la vez sin cargar el arreglo completo en memoria.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode("utf-8")
+        buffer += chunk
+
+        position = 0
+        while True:
+            # Saltar espacios, separadores y el inicio del arreglo
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ","):
+                position += 1
+            if not started:
+                if position >= len(buffer):
+                    break
+                if buffer[position] != "[":
+                    raise ValueError("La respuesta no es un arreglo JSON")
+                started = True
+                position += 1
+                continue
+            if position >= len(buffer) or buffer[position] == "]":
+                break
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Elemento incompleto: esperar el siguiente fragmento
+                break
+            yield item
+            position = end
+        buffer = buffer[position:]
+
+    if buffer.strip() not in ("", "]"):
+        raise ValueError("Arreglo JSON incompleto o mal formado")
+
+def stream_tvmaze_full_schedule(chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Obtiene toda la programación futura desde /schedule/full procesando la respuesta
+    en streaming, de modo que cada episodio se entrega sin cargar el payload completo.
+    Si la conexión falla a mitad de la respuesta se relanza la excepción, para que el
+    consumidor no confunda una respuesta truncada con una completa.
+    """
+    url = build_schedule_url("full")
+    logger.debug(f"Llamando a URL: {url}")
+    try:
+        # Se fija la codificación para que el decodificador incremental no adivine el charset
+        with requests.get(url, timeout=50, stream=True) as response:
+            response.raise_for_status()
+            response.encoding = "utf-8"
+            for record in iter_json_array(response.iter_content(chunk_size=chunk_size, decode_unicode=True)):
+                yield tag_record(record, "full")
+    except requests.RequestException as e:
+        logger.error(f"Error al llamar a la API: {e}")
+        raise
+
+def iter_json_file(file_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator:
+    """
+    Lee de forma incremental un archivo con un arreglo JSON (como el de /schedule/full),
+    retornando un elemento a la vez sin cargar el archivo completo en memoria.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        yield from iter_json_array(iter(lambda: file.read(chunk_size), ""))
+
+def iter_schedule(endpoint: str = "web", day: Optional[date] = None, country: Optional[str] = None) -> Iterator[dict]:
+    """
+    Interfaz única de extracción: retorna los episodios del endpoint indicado,
+    cada uno etiquetado con su origen en el campo '_source'.
+    """
+    if endpoint == "full":
+        yield from stream_tvmaze_full_schedule()
+    else:
+        yield from fetch_tvmaze_schedule(day, endpoint, country)
+
+def get_json_filename(day: date, endpoint: str = "web", country: Optional[str] = None) -> str:
+    """
+    Nombre del archivo .json de un día y endpoint. Los episodios web conservan el nombre
+    original (data_tvmaze_<día>.json); los de cadenas de TV incluyen el endpoint y el país
+    (data_tvmaze_network_<país>_<día>.json) para que ambos orígenes convivan en la carpeta.
+    """
+    if endpoint == "web":
+        return f"data_tvmaze_{day.isoformat()}.json"
+    if endpoint == "network":
+        return f"data_tvmaze_network_{(country or 'default').upper()}_{day.isoformat()}.json"
+    raise ValueError(f"El endpoint {endpoint} no se guarda por día")
+
+def save_json_response(data, folder_path: str, day: date, endpoint: str = "web", country: Optional[str] = None):
     """
     Guarda la respuesta (JSON) de la API en un archivo .json en la carpeta recibida.
     """
-    filename = f"data_tvmaze_{day.isoformat()}.json"
+    filename = get_json_filename(day, endpoint, country)
     full_path = os.path.join(folder_path, filename)
 
     with open(full_path, "w", encoding="utf-8") as file:
         json.dump(data, file, ensure_ascii=False, indent=2)
     logger.info(f"Archivo JSON guardado: {full_path}")
+
+def save_json_records(records: Iterable[dict], folder_path: str, filename: str) -> int:
+    """
+    Guarda registros en un archivo .json escribiéndolos uno a uno, para respuestas
+    grandes (como /schedule/full) que no deben mantenerse completas en memoria.
+    Se escribe en un archivo temporal que solo se renombra al destino cuando todos los
+    registros se escribieron; si la fuente falla no queda un archivo .json truncado.
+    Retorna la cantidad de registros escritos.
+    """
+    full_path = os.path.join(folder_path, filename)
+    temp_path = f"{full_path}.tmp"
+    count = 0
+
+    try:
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write("[\n")
+            for record in records:
+                if count:
+                    file.write(",\n")
+                json.dump(record, file, ensure_ascii=False)
+                count += 1
+            file.write("\n]\n")
+        os.replace(temp_path, full_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    logger.info(f"Archivo JSON guardado: {full_path} ({count} registros)")
+    return count
@@ -1,7 +1,11 @@
 import os
 import logging
 import pandas as pd
+import shutil
 import sqlite3
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +20,19 @@ def save_as_parquet(df: pd.DataFrame, parquet_file_path: str):
     logger.info(f"Archivo Parquet guardado en: {parquet_file_path}")
 
 
+def save_as_parquet_partition(df: pd.DataFrame, dataset_path: str, partition: str) -> str:
+    """
+    Guarda un DataFrame como una partición (estilo Hive: window=<partition>) de un dataset
+    Parquet, de modo que cada ventana de un backfill se escriba de forma independiente.
+    Retorna la ruta del archivo escrito.
+    """
+    partition_folder = os.path.join(dataset_path, f"window={partition}")
+    os.makedirs(partition_folder, exist_ok=True)
+    parquet_file_path = os.path.join(partition_folder, "part-0.parquet")
+    save_as_parquet(df, parquet_file_path)
+    return parquet_file_path
+
+
 # Función para crear las tablas en sqlite
 def create_database_tables(db_path):
     """
@@ -31,6 +48,9 @@ def create_database_tables(db_path):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    # Modo WAL: permite que el servicio de consultas lea mientras se cargan datos
+    cursor.execute('PRAGMA journal_mode=WAL')
+
     # Crear tabla shows
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS shows (
@@ -51,7 +71,9 @@ def create_database_tables(db_path):
         image_original TEXT,
         summary TEXT,
         days TEXT,
-        FOREIGN KEY (web_channel_id) REFERENCES web_channels (id)
+        network_id INTEGER,
+        FOREIGN KEY (web_channel_id) REFERENCES web_channels (id),
+        FOREIGN KEY (network_id) REFERENCES networks (id)
     )
     ''')
 
@@ -70,6 +92,7 @@ def create_database_tables(db_path):
         airstamp TEXT,
         runtime INTEGER,
         summary TEXT,
+        source TEXT,
         FOREIGN KEY (show_id) REFERENCES shows (id)
     )
     ''')
@@ -85,6 +108,17 @@ def create_database_tables(db_path):
     )
     ''')
 
+    # Crear tabla networks (cadenas de TV de los episodios de /schedule y /schedule/full)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS networks (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        official_site TEXT,
+        country_code TEXT,
+        FOREIGN KEY (country_code) REFERENCES country (code)
+    )
+    ''')
+
     # Crear tabla country
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS country (
@@ -114,11 +148,167 @@ def create_database_tables(db_path):
     )
     ''')
 
+    # Agregar columnas nuevas en bases de datos creadas con versiones anteriores del esquema
+    add_missing_columns(cursor, 'shows', {'network_id': 'INTEGER'})
+    add_missing_columns(cursor, 'episodes', {'source': 'TEXT'})
+
+    # Índices para las consultas del servicio de consultas (query_service.py)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_episodes_airdate ON episodes (airdate)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_episodes_show_id ON episodes (show_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_shows_web_channel_id ON shows (web_channel_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_show_genre_genre_id ON show_genre (genre_id)')
+
     # Guardar cambios y cerrar conexión
     conn.commit()
     conn.close()
 
 
+def add_missing_columns(cursor, table, columns):
+    """
+    Agrega a la tabla las columnas que aún no existen (migración de esquemas previos)
+    """
+    existing = {info[1] for info in cursor.execute(f"PRAGMA table_info({table})")}
+    for column, column_type in columns.items():
+        if column not in existing:
+            logger.info(f"Agregando columna {column} a la tabla {table}")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+# Sentencias de inserción por tabla, en el orden en que se cargan
+INSERT_SQL = {
+    'country': 'INSERT OR IGNORE INTO country (code, name, timezone) VALUES (?, ?, ?)',
+    'web_channels': 'INSERT OR IGNORE INTO web_channels (id, name, official_site, country_code) VALUES (?, ?, ?, ?)',
+    'networks': 'INSERT OR IGNORE INTO networks (id, name, official_site, country_code) VALUES (?, ?, ?, ?)',
+    'shows': '''
+        INSERT OR IGNORE INTO shows (
+            id, url, name, type, language, status, runtime, average_runtime, premiered, ended,
+            official_site, weight, web_channel_id, image_medium, image_original, summary, days,
+            network_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'episodes': '''
+        INSERT OR IGNORE INTO episodes (
+            id, show_id, url, name, season, number, type, airdate, airtime, airstamp,
+            runtime, summary, source
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'genres': 'INSERT OR IGNORE INTO genres (id, name) VALUES (?, ?)',
+    'show_genre': 'INSERT OR IGNORE INTO show_genre (show_id, genre_id) VALUES (?, ?)',
+}
+
+
+def safe_value(value):
+    """Convierte los NaN en None, formatea las fechas y preserva el tipo original para otros valores"""
+    if pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')  # Format as YYYY-MM-DD
+    return value  # Mantiene el tipo original del valor
+
+
+def get_genre_id(genre):
+    """
+    Id estable de un género a partir de su nombre. Se usa crc32 en lugar de hash(), cuyo
+    valor cambia entre procesos, para que la carga en paralelo genere los mismos ids.
+    """
+    return zlib.crc32(genre.encode('utf-8')) % 1000000
+
+
+def prepare_row(row):
+    """
+    Construye, a partir de una fila del DataFrame limpio, las tuplas a insertar en cada tabla.
+    Retorna una lista de pares (tabla, tupla) en el orden de INSERT_SQL.
+    """
+    records = []
+
+    # Manejar valores nulos o NaN
+    code = safe_value(row.get('_embedded.show.webchannel.country.code'))
+    name = safe_value(row.get('_embedded.show.webchannel.country.name'))
+    timezone = safe_value(row.get('_embedded.show.webchannel.country.timezone'))
+
+    # Datos de country
+    if code and name and timezone:
+        records.append(('country', (code, name, timezone)))
+
+    # Datos de la cadena de TV (episodios de /schedule y /schedule/full)
+    network_code = safe_value(row.get('_embedded.show.network.country.code'))
+    network_country = safe_value(row.get('_embedded.show.network.country.name'))
+    network_timezone = safe_value(row.get('_embedded.show.network.country.timezone'))
+
+    if network_code and network_country and network_timezone:
+        records.append(('country', (network_code, network_country, network_timezone)))
+
+    # Datos de web_channels
+    web_channel_id = safe_value(row.get('_embedded.show.webchannel.id'))
+    web_channel_name = safe_value(row.get('_embedded.show.webchannel.name'))
+    web_channel_site = safe_value(row.get('_embedded.show.webchannel.officialsite'))
+
+    if web_channel_id:
+        records.append(('web_channels', (web_channel_id, web_channel_name, web_channel_site, code)))
+
+    network_id = safe_value(row.get('_embedded.show.network.id'))
+    network_name = safe_value(row.get('_embedded.show.network.name'))
+    network_site = safe_value(row.get('_embedded.show.network.officialsite'))
+
+    if network_id:
+        records.append(('networks', (network_id, network_name, network_site, network_code)))
+
+    # Datos de shows
+    show_id = safe_value(row.get('_embedded.show.id'))
+    records.append(('shows', (
+        show_id,
+        safe_value(row.get('_embedded.show.url')),
+        safe_value(row.get('_embedded.show.name')),
+        safe_value(row.get('_embedded.show.type')),
+        safe_value(row.get('_embedded.show.language')),
+        safe_value(row.get('_embedded.show.status')),
+        safe_value(row.get('_embedded.show.runtime')),
+        safe_value(row.get('_embedded.show.averageruntime')),
+        safe_value(row.get('_embedded.show.premiered')),
+        safe_value(row.get('_embedded.show.ended')),
+        safe_value(row.get('_embedded.show.officialsite')),
+        safe_value(row.get('_embedded.show.weight')),
+        web_channel_id,
+        safe_value(row.get('_embedded.show.image.medium')),
+        safe_value(row.get('_embedded.show.image.original')),
+        safe_value(row.get('_embedded.show.summary')),
+        safe_value(row.get('_embedded.show.schedule.days')),
+        network_id
+    )))
+
+    # Datos de episodios con safe_value para todos los campos
+    records.append(('episodes', (
+        safe_value(row.get('id')),
+        show_id,
+        safe_value(row.get('url')),
+        safe_value(row.get('name')),
+        safe_value(row.get('season')),
+        safe_value(row.get('number')),
+        safe_value(row.get('type')),
+        safe_value(row.get('airdate')),
+        safe_value(row.get('airtime')),
+        safe_value(row.get('airstamp')),
+        safe_value(row.get('runtime')),
+        safe_value(row.get('summary')),
+        safe_value(row.get('_source')) or 'web'
+    )))
+
+    # Géneros asociados con el show
+    genres = row.get('_embedded.show.genres', '')
+    if isinstance(genres, str):
+        genres = genres.split(', ')
+
+    for genre in genres:
+        genre = safe_value(genre)
+        if genre:
+            genre_id = get_genre_id(genre)
+            records.append(('genres', (genre_id, genre)))
+            if show_id:
+                records.append(('show_genre', (show_id, genre_id)))
+
+    return records
+
+
 def insert_data_to_db(df_clean, db_path):
     """
     Inserta los datos limpios del DataFrame en la base de datos SQLite
@@ -128,114 +318,10 @@ def insert_data_to_db(df_clean, db_path):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
-    def safe_value(value):
-        """Convierte los NaN en None, formatea las fechas y preserva el tipo original para otros valores"""
-        if pd.isna(value):
-            return None
-        if isinstance(value, pd.Timestamp):
-            return value.strftime('%Y-%m-%d')  # Format as YYYY-MM-DD
-        return value  # Mantiene el tipo original del valor
-
     for _, row in df_clean.iterrows():
         try:
-
-            # Manejar valores nulos o NaN
-            code = safe_value(row.get('_embedded.show.webchannel.country.code'))
-            name = safe_value(row.get('_embedded.show.webchannel.country.name'))
-            timezone = safe_value(row.get('_embedded.show.webchannel.country.timezone'))
-
-            # Insertar datos en country
-            if code and name and timezone:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO country (code, name, timezone) VALUES (?, ?, ?)
-                ''', (code, name, timezone))
-
-            # Insertar datos en web_channels
-            web_channel_id = safe_value(row.get('_embedded.show.webchannel.id'))
-            web_channel_name = safe_value(row.get('_embedded.show.webchannel.name'))
-            web_channel_site = safe_value(row.get('_embedded.show.webchannel.officialsite'))
-
-            if web_channel_id:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO web_channels (id, name, official_site, country_code) VALUES (?, ?, ?, ?)
-                ''', (
-                    web_channel_id,
-                    web_channel_name,
-                    web_channel_site,
-                    code
-                ))
-
-            # Insertar datos en shows
-            show_id = safe_value(row.get('_embedded.show.id'))
-            show_url = safe_value(row.get('_embedded.show.url'))
-            show_name = safe_value(row.get('_embedded.show.name'))
-            show_type = safe_value(row.get('_embedded.show.type'))
-            show_language = safe_value(row.get('_embedded.show.language'))
-            show_status = safe_value(row.get('_embedded.show.status'))
-            show_runtime = safe_value(row.get('_embedded.show.runtime'))
-            show_avgruntime = safe_value(row.get('_embedded.show.averageruntime'))
-            show_premiered = safe_value(row.get('_embedded.show.premiered'))
-            show_ended = safe_value(row.get('_embedded.show.ended'))
-            show_site = safe_value(row.get('_embedded.show.officialsite'))
-            show_weight = safe_value(row.get('_embedded.show.weight'))
-            show_img_med = safe_value(row.get('_embedded.show.image.medium'))
-            show_img_orig = safe_value(row.get('_embedded.show.image.original'))
-            show_summary = safe_value(row.get('_embedded.show.summary'))
-            show_days = safe_value(row.get('_embedded.show.schedule.days'))
-
-            cursor.execute('''
-                INSERT OR IGNORE INTO shows (
-                    id, url, name, type, language, status, runtime, average_runtime, premiered, ended,
-                    official_site, weight, web_channel_id, image_medium, image_original, summary, days
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                show_id, show_url, show_name, show_type, show_language, show_status,
-                show_runtime, show_avgruntime, show_premiered, show_ended, show_site,
-                show_weight, web_channel_id, show_img_med, show_img_orig, show_summary, show_days
-            ))
-
-            # Procesar datos de episodios con safe_value para todos los campos
-            episode_id = safe_value(row.get('id'))
-            episode_url = safe_value(row.get('url'))
-            episode_name = safe_value(row.get('name'))
-            episode_season = safe_value(row.get('season'))
-            episode_number = safe_value(row.get('number'))
-            episode_type = safe_value(row.get('type'))
-            episode_airdate = safe_value(row.get('airdate'))
-            episode_airtime = safe_value(row.get('airtime'))
-            episode_airstamp = safe_value(row.get('airstamp'))
-            episode_runtime = safe_value(row.get('runtime'))
-            episode_summary = safe_value(row.get('summary'))
-
-            # Insertar en episodes con valores seguros
-            cursor.execute('''
-                INSERT OR IGNORE INTO episodes (
-                    id, show_id, url, name, season, number, type, airdate, airtime, airstamp,
-                    runtime, summary
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                episode_id, show_id, episode_url, episode_name, episode_season,
-                episode_number, episode_type, episode_airdate, episode_airtime, episode_airstamp,
-                episode_runtime, episode_summary
-            ))
-
-            # Insertar géneros asociados con el show
-            genres = row.get('_embedded.show.genres', '')
-            if isinstance(genres, str):
-                genres = genres.split(', ')
-
-            for genre in genres:
-                genre = safe_value(genre)
-                if genre:
-                    genre_id = abs(hash(genre)) % 1000000
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO genres (id, name) VALUES (?, ?)
-                    ''', (genre_id, genre))
-
-                    if show_id:
-                        cursor.execute('''
-                            INSERT OR IGNORE INTO show_genre (show_id, genre_id) VALUES (?, ?)
-                        ''', (show_id, genre_id))
+            for table, values in prepare_row(row):
+                cursor.execute(INSERT_SQL[table], values)
 
         except sqlite3.Error as e:
             logger.error(f"Error al insertar los datos en la Base de Datos: {e}")
@@ -245,4 +331,171 @@ def insert_data_to_db(df_clean, db_path):
 
     conn.commit()
     conn.close()
-    logger.info("Datos insertados correctamente.")
\ No newline at end of file
+    logger.info("Datos insertados correctamente.")
+
+
+# Columnas que se copian de cada base de datos de staging a la principal
+MERGE_COLUMNS = {
+    'country': 'code, name, timezone',
+    'web_channels': 'id, name, official_site, country_code',
+    'networks': 'id, name, official_site, country_code',
+    'shows': ('id, url, name, type, language, status, runtime, average_runtime, premiered, ended, '
+              'official_site, weight, web_channel_id, image_medium, image_original, summary, days, network_id'),
+    'episodes': ('id, show_id, url, name, season, number, type, airdate, airtime, airstamp, '
+                 'runtime, summary, source'),
+    'genres': 'id, name',
+    'show_genre': 'show_id, genre_id',
+}
+
+# SQLite admite por defecto hasta 10 bases de datos adjuntas (ATTACH) por conexión
+MAX_SHARDS = 8
+
+
+def split_into_shards(df_clean, shards):
+    """
+    Divide el DataFrame limpio en hasta 'shards' rangos consecutivos de filas de tamaño
+    similar, en el orden en que se cargarían con un único escritor (cronológico, ya que los
+    archivos se leen por fecha). Se divide por filas y no por mes para que la carga de un
+    solo mes también se reparta entre todos los procesos. Retorna una lista de listas de DataFrames.
+    """
+    return [[df_clean.iloc[start:end]] for start, end in get_contiguous_bounds(len(df_clean), shards)]
+
+
+def split_contiguous(items, shards):
+    """
+    Reparte 'items' (por ejemplo, los archivos Parquet de un backfill) en hasta 'shards'
+    grupos de elementos consecutivos de tamaño similar.
+    """
+    items = list(items)
+    return [items[start:end] for start, end in get_contiguous_bounds(len(items), shards)]
+
+
+def get_contiguous_bounds(total, shards):
+    """
+    Límites (inicio, fin) de hasta 'shards' rangos consecutivos que cubren 'total' elementos.
+    Se mantiene el orden cronológico: cada rango es posterior al anterior, y como la fusión
+    recorre los shards en orden e INSERT OR IGNORE conserva la primera versión de cada fila,
+    se conservan las mismas versiones que con un único escritor.
+    """
+    shards = min(shards, total)
+    bounds = [total * i // shards for i in range(shards + 1)] if shards else []
+    return list(zip(bounds, bounds[1:]))
+
+
+def load_shard(partitions, staging_path):
+    """
+    Prepara las tuplas de un shard y las escribe en su propia base de datos de staging.
+    Cada partición puede ser un DataFrame o la ruta de un archivo Parquet.
+    Se ejecuta en un proceso separado; retorna la cantidad de episodios escritos.
+    """
+    create_database_tables(staging_path)
+    conn = sqlite3.connect(staging_path)
+    # El staging es temporal: no necesita sincronización con disco. El diario en memoria
+    # permite deshacer una partición cuyo lote falla (con journal_mode=OFF no es posible)
+    conn.execute('PRAGMA journal_mode=MEMORY')
+    conn.execute('PRAGMA synchronous=OFF')
+
+    rows = 0
+    try:
+        for partition in partitions:
+            df_partition = pd.read_parquet(partition) if isinstance(partition, str) else partition
+            # Los diccionarios por fila evitan el costo de construir una Series por fila (iterrows)
+            prepared = [(row.get('id'), prepare_row(row)) for row in df_partition.to_dict('records')]
+            write_partition(conn, prepared)
+            rows += len(df_partition)
+    finally:
+        conn.close()
+    return rows
+
+
+def write_partition(conn, prepared):
+    """
+    Escribe las tuplas preparadas de una partición en una sola transacción con executemany.
+    Si el lote falla, se deshace y se reintenta fila por fila, registrando y omitiendo las
+    filas con error como lo hace insert_data_to_db, para que una fila no descarte el shard.
+    """
+    values_by_table = {table: [] for table in INSERT_SQL}
+    for _, records in prepared:
+        for table, values in records:
+            values_by_table[table].append(values)
+
+    try:
+        with conn:
+            for table, values in values_by_table.items():
+                conn.executemany(INSERT_SQL[table], values)
+        return
+    except sqlite3.Error as e:
+        logger.warning(f"Error en la inserción por lotes, se reintenta fila por fila: {e}")
+
+    with conn:
+        for episode_id, records in prepared:
+            try:
+                for table, values in records:
+                    conn.execute(INSERT_SQL[table], values)
+            except sqlite3.Error as e:
+                logger.error(f"Error al insertar los datos en la Base de Datos: {e}")
+                logger.error(f"Detalle del error para ID {episode_id}")
+
+
+def merge_staging_databases(staging_paths, db_path):
+    """
+    Adjunta las bases de datos de staging y copia su contenido a la base de datos
+    principal con INSERT ... SELECT, en una sola transacción.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    aliases = [f"shard_{i}" for i in range(len(staging_paths))]
+    try:
+        for alias, staging_path in zip(aliases, staging_paths):
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (staging_path,))
+
+        conn.execute("BEGIN")
+        try:
+            for alias in aliases:
+                for table, columns in MERGE_COLUMNS.items():
+                    conn.execute(f"INSERT OR IGNORE INTO main.{table} ({columns}) "
+                                 f"SELECT {columns} FROM {alias}.{table}")
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+        for alias in aliases:
+            conn.execute(f"DETACH DATABASE {alias}")
+    finally:
+        conn.close()
+
+
+def insert_data_to_db_sharded(data, db_path, workers=None, staging_folder=None):
+    """
+    Inserta los datos limpios en la base de datos SQLite en paralelo: cada proceso prepara
+    las filas de un shard (rangos consecutivos de filas, o archivos Parquet de un
+    backfill) y las escribe en su propia base de datos de staging; al final se fusionan
+    todas en la base de datos principal. 'data' puede ser un DataFrame o una lista de rutas Parquet.
+    Las bases de staging se crean en una carpeta temporal dentro de 'staging_folder' (por
+    defecto, la carpeta de la base de datos) que se elimina al terminar, aun si la carga falla.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, MAX_SHARDS))
+
+    if isinstance(data, pd.DataFrame):
+        shards = split_into_shards(data, workers)
+    else:
+        shards = split_contiguous(data, workers)
+
+    if not shards:
+        logger.warning("No hay datos para cargar en la base de datos.")
+        return
+
+    # Carpeta de staging única por carga, para que cargas simultáneas no compartan archivos
+    staging_folder = tempfile.mkdtemp(prefix="staging_", dir=staging_folder or os.path.dirname(os.path.abspath(db_path)))
+    staging_paths = [os.path.join(staging_folder, f"shard_{i}.db") for i in range(len(shards))]
+
+    try:
+        logger.info(f"Preparando {len(shards)} shards en paralelo para la carga en {db_path}")
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            rows = sum(executor.map(load_shard, shards, staging_paths))
+
+        logger.info(f"Fusionando {len(staging_paths)} bases de datos de staging ({rows} filas)...")
+        merge_staging_databases(staging_paths, db_path)
+    finally:
+        shutil.rmtree(staging_folder, ignore_errors=True)
+    logger.info("Datos insertados correctamente.")
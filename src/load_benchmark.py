@@ -0,0 +1,139 @@
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from load import create_database_tables, insert_data_to_db_sharded
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s [%(levelname)s] %(name)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+logger = logging.getLogger("load_benchmark")
+logger.setLevel(logging.INFO)
+
+GENRES = ["Drama", "Comedy", "Action", "Anime", "Reality", "Crime", "Romance", "Documentary", "Family", "Horror"]
+COUNTRIES = [("US", "United States", "America/New_York"), ("GB", "United Kingdom", "Europe/London"),
+             ("JP", "Japan", "Asia/Tokyo"), ("RU", "Russian Federation", "Europe/Moscow")]
+
+
+def build_synthetic_dataset(start: date, years: int, episodes_per_day: int, shows: int = 2000,
+                            channels: int = 150, seed: int = 42) -> pd.DataFrame:
+    """
+    Genera un DataFrame con las columnas del DataFrame limpio (perform_data_cleaning)
+    para un rango de varios años, con 'episodes_per_day' episodios por día.
+    """
+    rng = np.random.default_rng(seed)
+    airdates = pd.date_range(start, periods=years * 365, freq='D').repeat(episodes_per_day)
+    total = len(airdates)
+
+    show_ids = rng.integers(1, shows + 1, total)
+    channel_ids = show_ids % channels + 1
+    country_index = channel_ids % len(COUNTRIES)
+    genre_index = rng.integers(0, len(GENRES), (shows + 1, 2))
+
+    df = pd.DataFrame({
+        'id': np.arange(1, total + 1),
+        'url': [f"https://www.tvmaze.com/episodes/{i}" for i in range(1, total + 1)],
+        'name': [f"Episodio {i}" for i in range(1, total + 1)],
+        'season': rng.integers(1, 10, total),
+        'number': rng.integers(1, 24, total),
+        'type': 'regular',
+        'airdate': airdates,
+        'airstamp': airdates,
+        'runtime': rng.choice([25.0, 30.0, 45.0, 60.0], total),
+        'summary': 'Resumen sintético del episodio',
+        '_source': 'web',
+        '_embedded.show.id': show_ids,
+        '_embedded.show.url': [f"https://www.tvmaze.com/shows/{i}" for i in show_ids],
+        '_embedded.show.name': [f"Show {i}" for i in show_ids],
+        '_embedded.show.type': 'Scripted',
+        '_embedded.show.language': 'English',
+        '_embedded.show.status': 'Running',
+        '_embedded.show.averageruntime': (show_ids % 4 + 1) * 15.0,
+        '_embedded.show.officialsite': [f"https://channel{c}.example.com/show/{s}" for c, s in zip(channel_ids, show_ids)],
+        '_embedded.show.weight': show_ids % 100,
+        '_embedded.show.genres': [f"{GENRES[genre_index[s][0]]}, {GENRES[genre_index[s][1]]}" for s in show_ids],
+        '_embedded.show.schedule.days': 'Monday',
+        '_embedded.show.webchannel.id': channel_ids,
+        '_embedded.show.webchannel.name': [f"Channel {c}" for c in channel_ids],
+        '_embedded.show.webchannel.officialsite': [f"https://channel{c}.example.com" for c in channel_ids],
+        '_embedded.show.webchannel.country.code': [COUNTRIES[i][0] for i in country_index],
+        '_embedded.show.webchannel.country.name': [COUNTRIES[i][1] for i in country_index],
+        '_embedded.show.webchannel.country.timezone': [COUNTRIES[i][2] for i in country_index],
+    })
+    return df
+
+
+def count_rows(db_path: str) -> dict:
+    """Cantidad de filas por tabla, para verificar que ambos modos cargan lo mismo"""
+    conn = sqlite3.connect(db_path)
+    tables = ['country', 'web_channels', 'networks', 'shows', 'episodes', 'genres', 'show_genre']
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+    conn.close()
+    return counts
+
+
+def run_benchmark(years: int, episodes_per_day: int, workers: int) -> dict:
+    """
+    Compara la carga con un único escritor contra la carga en paralelo por shards sobre el
+    mismo conjunto de datos sintético. Ambas usan la inserción por lotes (executemany) con
+    staging y fusión, de modo que la diferencia medida corresponde solo al paralelismo.
+    """
+    df = build_synthetic_dataset(date(2020, 1, 1), years, episodes_per_day)
+    logger.info(f"Conjunto sintético: {len(df)} episodios en {years} años")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        single_path = os.path.join(tmpdir, "single.db")
+        create_database_tables(single_path)
+        started = time.perf_counter()
+        insert_data_to_db_sharded(df, single_path, workers=1)
+        single_seconds = time.perf_counter() - started
+
+        sharded_path = os.path.join(tmpdir, "sharded.db")
+        create_database_tables(sharded_path)
+        started = time.perf_counter()
+        insert_data_to_db_sharded(df, sharded_path, workers=workers)
+        sharded_seconds = time.perf_counter() - started
+
+        single_counts, sharded_counts = count_rows(single_path), count_rows(sharded_path)
+
+    if single_counts != sharded_counts:
+        logger.error(f"Las cargas no coinciden: {single_counts} != {sharded_counts}")
+
+    return {
+        "rows": len(df),
+        "workers": workers,
+        "single_seconds": single_seconds,
+        "sharded_seconds": sharded_seconds,
+        "speedup": single_seconds / sharded_seconds,
+        "counts_match": single_counts == sharded_counts,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara la carga SQLite con un escritor contra la carga por shards")
+    parser.add_argument("--years", type=int, default=3, help="Años del conjunto sintético")
+    parser.add_argument("--episodes-per-day", type=int, default=100, help="Episodios por día")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos de la carga por shards")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.years, args.episodes_per_day, args.workers)
+    logger.info(f"Filas: {report['rows']}, procesos: {report['workers']}")
+    logger.info(f"Un escritor: {report['single_seconds']:.2f} s")
+    logger.info(f"Por shards:  {report['sharded_seconds']:.2f} s")
+    logger.info(f"Aceleración: {report['speedup']:.2f}x (conteos coinciden: {report['counts_match']})")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,12 @@
+import argparse
 import logging
 import os
 import sys
 from datetime import date, timedelta
 from typing import List
-import pandas as pd
 
-from extraction import fetch_tvmaze_schedule, save_json_response
-from transform import create_dataframe_from_json, perform_data_cleaning
-from analysis import generate_profiling_report, run_aggregations
-from load import save_as_parquet, create_database_tables, insert_data_to_db
+# Las dependencias pesadas (pandas/pyarrow, BeautifulSoup, ydata_profiling) se importan
+# dentro de cada etapa, de modo que un comando solo cargue lo que necesita.
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,65 +14,397 @@ logging.basicConfig(
     handlers=[logging.StreamHandler(sys.stdout)]
 )
 
-def main():
+logger = logging.getLogger(__name__)
+
+# Definición de rutas
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JSON_FOLDER = os.path.join(PROJECT_ROOT, "json")
+BACKFILL_JSON_FOLDER = os.path.join(JSON_FOLDER, "backfill")
+PROFILING_FOLDER = os.path.join(PROJECT_ROOT, "profiling")
+DATA_FOLDER = os.path.join(PROJECT_ROOT, "data")
+DB_FOLDER = os.path.join(PROJECT_ROOT, "db")
+
+DATABASE_PATH = os.path.join(DB_FOLDER, "tvmaze_data.db")
+SHOW_STORE_PATH = os.path.join(DB_FOLDER, "show_entities.db")
+PARQUET_FILE_PATH = os.path.join(DATA_FOLDER, "clean_data_tvmaze_january_2024.parquet")
+ENRICHED_PARQUET_FILE_PATH = os.path.join(DATA_FOLDER, "shows_enriched.parquet")
+BACKFILL_DATASET_PATH = os.path.join(DATA_FOLDER, "backfill")
+PROFILE_FILE_PATH = os.path.join(PROFILING_FOLDER, "profiling_report.html")
+
+
+def extract(dates: List[date], endpoint: str = "web", country: str = None):
     """
-    Ejecuta el pipeline ETL para extraer, transformar y cargar información de episodios emitidos 
-    en plataformas web/streaming, utilizando la API de TVMaze para el mes de enero de 2024.
+    Extrae de la API de TVMaze los episodios de las fechas recibidas y los guarda en /json.
+    El endpoint 'full' no se consulta por día: se procesa en streaming y se guarda en un solo archivo.
     """
-    logger = logging.getLogger(__name__)
-    logger.info("Iniciando proceso ETL...")
-
-    # 1. Parámetros
-    year = 2024
-    month = 1
-    database_name = "tvmaze_data.db"
+    from extraction import fetch_tvmaze_schedule, iter_schedule, save_json_response, save_json_records
 
-    # 2. Definición de rutas
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    json_folder = os.path.join(project_root, "json")
-    profiling_folder = os.path.join(project_root, "profiling")
-    data_folder = os.path.join(project_root, "data")
-    db_folder = os.path.join(project_root, "db")
+    if endpoint == "full":
+        logger.info("Obteniendo programación completa desde /schedule/full...")
+        filename = f"data_tvmaze_full_{date.today().isoformat()}.json"
+        save_json_records(iter_schedule("full"), JSON_FOLDER, filename)
+        return
 
-    # 3. Extraer datos para todos los días de enero del 2024
-    all_dates_jan_2024 = get_all_dates_for_month(year, month)
-    for day in all_dates_jan_2024:
+    for day in dates:
         logger.info(f"Obteniendo data para fecha: {day}")
-        response_json = fetch_tvmaze_schedule(day)
-        save_json_response(response_json, json_folder, day)
-    
-    # 4. Transformar datos (generar Dataframe de Pandas)
+        response_json = fetch_tvmaze_schedule(day, endpoint, country)
+        save_json_response(response_json, JSON_FOLDER, day, endpoint, country)
+
+
+def get_raw_json_files(dates: List[date], endpoint: str = "web", country: str = None) -> List[str]:
+    """
+    Retorna los archivos JSON de /json que corresponden a las fechas y endpoint solicitados,
+    para no leer otros archivos de la carpeta (otros meses u orígenes). Para 'full' se usa
+    la extracción más reciente de /schedule/full.
+    """
+    from extraction import get_json_filename
+
+    if endpoint == "full":
+        full_files = sorted(file for file in os.listdir(JSON_FOLDER)
+                            if file.startswith("data_tvmaze_full_") and file.endswith(".json"))
+        return [os.path.join(JSON_FOLDER, full_files[-1])] if full_files else []
+
+    files = []
+    for day in dates:
+        file_path = os.path.join(JSON_FOLDER, get_json_filename(day, endpoint, country))
+        if os.path.exists(file_path):
+            files.append(file_path)
+        else:
+            logger.warning(f"No existe el archivo extraído para la fecha {day}: {file_path}")
+    return files
+
+
+def build_raw_dataframe(dates: List[date], endpoint: str = "web", country: str = None):
+    """
+    Construye el DataFrame sin limpiar a partir de los archivos JSON extraídos para las fechas
+    solicitadas. El archivo de /schedule/full se lee de forma incremental y por bloques.
+    """
+    from extraction import iter_json_file
+    from transform import create_dataframe_from_json_files, create_dataframe_from_records
+
     logger.info("Creando DataFrames desde JSON...")
-    df = create_dataframe_from_json(json_folder)
+    files = get_raw_json_files(dates, endpoint, country)
+    if endpoint == "full":
+        return create_dataframe_from_records(record for file in files for record in iter_json_file(file))
+    return create_dataframe_from_json_files(files)
 
-    # 5. Generar profiling
+
+def profile(df=None, output_file: str = PROFILE_FILE_PATH, dates: List[date] = None,
+            endpoint: str = "web", country: str = None):
+    """Genera el reporte de profiling de los datos sin limpiar"""
+    from analysis import generate_profiling_report
+
+    df = build_raw_dataframe(dates, endpoint, country) if df is None else df
     logger.info("Generando reporte de profiling...")
-    profile_file = os.path.join(profiling_folder, "profiling_report.html")
-    generate_profiling_report(df, profile_file)
+    generate_profiling_report(df, output_file)
+
 
-    # 6. Limpieza / transformaciones
+def transform(df=None, parquet_file_path: str = PARQUET_FILE_PATH, enrich: bool = True,
+              dates: List[date] = None, endpoint: str = "web", country: str = None):
+    """
+    Limpia los datos, enriquece los shows y guarda el resultado en formato Parquet (snappy).
+    """
+    from transform import perform_data_cleaning
+    from load import save_as_parquet
+
+    df = build_raw_dataframe(dates, endpoint, country) if df is None else df
     logger.info("Limpieza y transformaciones en los datos...")
     df_clean = perform_data_cleaning(df)
 
-    # 7. Almacenar en Parquet (snappy)
+    if enrich:
+        from enrichment import enrich_shows, build_enrichment_dataframe
+
+        # Enriquecer shows (reparto, temporadas y metadatos) usando el almacén local de entidades
+        logger.info("Enriqueciendo shows con /shows/{id}...")
+        enriched_shows = enrich_shows(df_clean, SHOW_STORE_PATH)
+        save_as_parquet(build_enrichment_dataframe(enriched_shows), ENRICHED_PARQUET_FILE_PATH)
+
     logger.info("Guardando DataFrame limpio en formato Parquet snappy...")
-    parquet_file_path = os.path.join(data_folder, "clean_data_tvmaze_january_2024.parquet")
     save_as_parquet(df_clean, parquet_file_path)
 
-    # 8. Cargar la información en DB (SQLite) del archivo .parquet
-    logger.info("Cargando datos en base de datos SQLite desde archivo .parquet...")
 
+def load(parquet_file_path: str = PARQUET_FILE_PATH, db_path: str = DATABASE_PATH, workers: int = None):
+    """
+    Carga la información del archivo .parquet en la base de datos SQLite.
+    Con 'workers' la carga se hace en paralelo por shards (insert_data_to_db_sharded).
+    """
+    import pandas as pd
+    from load import create_database_tables, insert_data_to_db, insert_data_to_db_sharded
+
+    logger.info("Cargando datos en base de datos SQLite desde archivo .parquet...")
     df_data_parquet = pd.read_parquet(parquet_file_path)
-    db_path = os.path.join(db_folder, database_name)
     create_database_tables(db_path)
-    insert_data_to_db(df_data_parquet, db_path)
+    if workers:
+        insert_data_to_db_sharded(df_data_parquet, db_path, workers)
+    else:
+        insert_data_to_db(df_data_parquet, db_path)
+    return df_data_parquet
+
 
-    # 8. Operaciones de agregación
+def aggregate(df_data_parquet=None, parquet_file_path: str = PARQUET_FILE_PATH):
+    """Realiza las operaciones de agregación sobre los datos limpios"""
+    import pandas as pd
+    from analysis import run_aggregations
+
+    if df_data_parquet is None:
+        df_data_parquet = pd.read_parquet(parquet_file_path)
     logger.info("Realizando consultas de agregación...")
     run_aggregations(df_data_parquet)
 
+
+def run(dates: List[date], endpoint: str = "web", country: str = None, enrich: bool = True,
+        skip_profile: bool = False, workers: int = None):
+    """
+    Ejecuta el pipeline ETL completo: extracción, profiling, limpieza, enriquecimiento,
+    almacenamiento en Parquet, carga en SQLite y agregaciones.
+    """
+    extract(dates, endpoint, country)
+    df = build_raw_dataframe(dates, endpoint, country)
+    if not skip_profile:
+        profile(df)
+    transform(df, enrich=enrich)
+    df_data_parquet = load(workers=workers)
+    aggregate(df_data_parquet)
+
+
+def parse_date(value: str) -> date:
+    """Convierte un argumento YYYY-MM-DD en un objeto date"""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Fecha inválida: {value}. Formato esperado: YYYY-MM-DD")
+
+
+def parse_window(value: str):
+    """Convierte el argumento de ventana en 'week', 'month' o un número de días"""
+    return int(value) if value.isdigit() else value
+
+
+def get_requested_dates(args) -> List[date]:
+    """Retorna las fechas a procesar: el rango --start/--end o, en su defecto, el mes --year/--month"""
+    if args.start or args.end:
+        return [args.start + timedelta(days=i) for i in range((args.end - args.start).days + 1)]
+    return get_all_dates_for_month(args.year, args.month)
+
+
+def validate_date_range(parser: argparse.ArgumentParser, args):
+    """Valida el rango --start/--end de los subcomandos que reciben fechas"""
+    start, end = getattr(args, "start", None), getattr(args, "end", None)
+    if (start or end) and not (start and end):
+        parser.error("Se deben indicar --start y --end juntos")
+    if start and end and end < start:
+        parser.error(f"--end ({end}) debe ser igual o posterior a --start ({start})")
+
+
+def validate_backfill_options(parser: argparse.ArgumentParser, args):
+    """Rechaza las opciones de 'run' que el modo backfill no admite, en lugar de ignorarlas"""
+    if not getattr(args, "backfill", False):
+        return
+    if args.no_enrich or args.no_profile:
+        parser.error("--no-enrich y --no-profile no aplican con --backfill (el backfill no enriquece "
+                     "ni genera profiling)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Define la interfaz de línea de comandos del pipeline"""
+    dates_parser = argparse.ArgumentParser(add_help=False)
+    dates_parser.add_argument("--year", type=int, default=2024, help="Año a procesar (por defecto 2024)")
+    dates_parser.add_argument("--month", type=int, default=1, help="Mes a procesar (por defecto 1)")
+    dates_parser.add_argument("--start", type=parse_date, help="Fecha inicial YYYY-MM-DD (reemplaza --year/--month)")
+    dates_parser.add_argument("--end", type=parse_date, help="Fecha final YYYY-MM-DD (inclusive)")
+    dates_parser.add_argument("--endpoint", choices=["web", "network", "full"], default="web",
+                              help="Endpoint de programación de TVMaze")
+    dates_parser.add_argument("--country", help="Código ISO del país, requerido por el endpoint 'network'")
+
+    parser = argparse.ArgumentParser(description="Pipeline ETL de episodios de TVMaze")
+    subparsers = parser.add_subparsers(dest="command")
+
+    subparsers.add_parser("extract", parents=[dates_parser], help="Extrae los datos de la API a /json")
+
+    transform_parser = subparsers.add_parser("transform", parents=[dates_parser], help="Limpia los datos de /json y los guarda en Parquet")
+    transform_parser.add_argument("--no-enrich", action="store_true", help="Omite el enriquecimiento de shows")
+
+    workers_parser = argparse.ArgumentParser(add_help=False)
+    workers_parser.add_argument("--workers", type=int,
+                                help="Carga en paralelo con N procesos (staging por shards y fusión final)")
+
+    subparsers.add_parser("load", parents=[workers_parser], help="Carga el archivo Parquet limpio en SQLite")
+    subparsers.add_parser("aggregate", help="Ejecuta las agregaciones sobre el archivo Parquet limpio")
+    subparsers.add_parser("profile", parents=[dates_parser], help="Genera el reporte de profiling de los datos de /json")
+
+    run_parser = subparsers.add_parser("run", parents=[dates_parser, workers_parser], help="Ejecuta el pipeline completo")
+    run_parser.add_argument("--no-enrich", action="store_true", help="Omite el enriquecimiento de shows")
+    run_parser.add_argument("--no-profile", action="store_true", help="Omite el reporte de profiling")
+    run_parser.add_argument("--backfill", action="store_true",
+                            help="Procesa el rango --start/--end por ventanas con memoria acotada")
+    run_parser.add_argument("--window", type=parse_window, default="month",
+                            help="Tamaño de ventana del backfill: 'week', 'month' o número de días")
+
+    serve_parser = subparsers.add_parser("serve", help="Expone la base de datos SQLite como servicio HTTP/JSON de consultas")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escucha el servicio")
+    serve_parser.add_argument("--port", type=int, default=8000, help="Puerto del servicio")
+    serve_parser.add_argument("--pool-size", type=int, default=4, help="Conexiones de solo lectura del pool")
+    serve_parser.add_argument("--cache-size", type=int, default=256, help="Resultados guardados en la caché LRU")
+    return parser
+
+
+def main(argv=None):
+    """
+    Ejecuta el pipeline ETL para extraer, transformar y cargar información de episodios emitidos
+    en plataformas web/streaming, utilizando la API de TVMaze (por defecto, enero de 2024).
+    Sin subcomando se ejecuta el pipeline completo ('run').
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:] or ["run"])
+    validate_date_range(parser, args)
+    validate_backfill_options(parser, args)
+
+    logger.info(f"Iniciando proceso ETL ({args.command})...")
+
+    if args.command == "extract":
+        extract(get_requested_dates(args), args.endpoint, args.country)
+    elif args.command == "transform":
+        transform(enrich=not args.no_enrich, dates=get_requested_dates(args),
+                  endpoint=args.endpoint, country=args.country)
+    elif args.command == "load":
+        load(workers=args.workers)
+    elif args.command == "aggregate":
+        aggregate()
+    elif args.command == "profile":
+        profile(dates=get_requested_dates(args), endpoint=args.endpoint, country=args.country)
+    elif args.command == "serve":
+        from query_service import serve
+        serve(DATABASE_PATH, args.host, args.port, args.pool_size, args.cache_size)
+    elif args.command == "run" and args.backfill:
+        dates = get_requested_dates(args)
+        run_backfill(dates[0], dates[-1], args.window, BACKFILL_JSON_FOLDER, BACKFILL_DATASET_PATH, DATABASE_PATH,
+                     args.workers, args.endpoint, args.country)
+    elif args.command == "run":
+        run(get_requested_dates(args), args.endpoint, args.country,
+            enrich=not args.no_enrich, skip_profile=args.no_profile, workers=args.workers)
+    else:
+        parser.print_help()
+        return
+
     logger.info("Proceso ETL finalizado exitosamente.")
 
+def run_backfill(start_date: date, end_date: date, window, json_folder: str, dataset_path: str, db_path: str,
+                 load_workers: int = None, endpoint: str = "web", country: str = None):
+    """
+    Ejecuta el ETL para un rango de fechas arbitrariamente largo procesándolo por ventanas,
+    de modo que la memoria dependa del tamaño de la ventana y no del rango completo:
+    1. Extrae los días faltantes del endpoint ('web' o 'network' con su país), un archivo
+       JSON por día. Los días cuya petición falla no se guardan y el backfill se detiene tras
+       intentar todos, para que al reanudarlo se vuelvan a pedir en lugar de tratarse como
+       días sin episodios. Con 'full' se descarga una sola vez /schedule/full en streaming y
+       cada ventana se arma leyendo ese archivo de forma incremental y filtrando por 'airdate'.
+    2. Primera pasada: acumula las estadísticas globales de limpieza ventana por ventana.
+    3. Segunda pasada: limpia cada ventana con esas estadísticas, la escribe como partición
+       Parquet y la carga en la base de datos. Con 'load_workers', las particiones se cargan
+       al final en paralelo (insert_data_to_db_sharded) en lugar de ventana por ventana.
+    """
+    import pandas as pd
+    import requests
+    from extraction import (fetch_tvmaze_schedule, save_json_response, get_json_filename, iter_schedule,
+                            save_json_records, iter_json_file)
+    from transform import (create_dataframe_from_json_files, create_dataframe_from_records, perform_data_cleaning,
+                           CleaningStatsAccumulator)
+    from load import save_as_parquet_partition, create_database_tables, insert_data_to_db, insert_data_to_db_sharded
+
+    # El backfill usa su propia carpeta de JSON para que las ejecuciones mensuales no lean sus archivos
+    os.makedirs(json_folder, exist_ok=True)
+    windows = get_date_windows(start_date, end_date, window)
+    logger.info(f"Backfill de {start_date} a {end_date} en {len(windows)} ventanas ({window})")
+
+    # 1. Extracción (se omiten los días ya extraídos para poder reanudar)
+    if endpoint == "full":
+        filename = f"data_tvmaze_full_{date.today().isoformat()}.json"
+        full_path = os.path.join(json_folder, filename)
+        if not os.path.exists(full_path):
+            logger.info("Obteniendo programación completa desde /schedule/full...")
+            save_json_records(iter_schedule("full"), json_folder, filename)
+
+        def read_window(window_dates):
+            airdates = {day.isoformat() for day in window_dates}
+            return create_dataframe_from_records(
+                record for record in iter_json_file(full_path) if record.get("airdate") in airdates)
+    else:
+        window_files = {}
+        failed_days = []
+        for window_dates in windows:
+            files = []
+            for day in window_dates:
+                file_path = os.path.join(json_folder, get_json_filename(day, endpoint, country))
+                if not os.path.exists(file_path):
+                    logger.info(f"Obteniendo data para fecha: {day}")
+                    try:
+                        response_json = fetch_tvmaze_schedule(day, endpoint, country, raise_errors=True)
+                        save_json_response(response_json, json_folder, day, endpoint, country)
+                    except requests.RequestException:
+                        failed_days.append(day)
+                        continue
+                files.append(file_path)
+            window_files[window_dates[0]] = files
+
+        if failed_days:
+            raise RuntimeError(f"No se pudieron extraer {len(failed_days)} días ({', '.join(map(str, failed_days))}); "
+                               f"vuelva a ejecutar el backfill para reintentarlos")
+
+        def read_window(window_dates):
+            return create_dataframe_from_json_files(window_files[window_dates[0]])
+
+    # 2. Primera pasada: estadísticas globales para la limpieza
+    logger.info("Calculando estadísticas globales de limpieza...")
+    stats_accumulator = CleaningStatsAccumulator()
+    for window_dates in windows:
+        stats_accumulator.update(read_window(window_dates))
+    stats = stats_accumulator.result()
+
+    # 3. Segunda pasada: limpieza, partición Parquet y carga por ventana
+    create_database_tables(db_path)
+    partition_paths = []
+    for window_dates in windows:
+        logger.info(f"Procesando ventana {window_dates[0]} - {window_dates[-1]}...")
+        df = read_window(window_dates)
+        if df.empty:
+            logger.warning(f"Ventana {window_dates[0]} sin datos.")
+            continue
+        df_clean = perform_data_cleaning(df, stats)
+        parquet_file_path = save_as_parquet_partition(df_clean, dataset_path, window_dates[0].isoformat())
+        if not os.path.exists(parquet_file_path):
+            continue
+        if load_workers:
+            partition_paths.append(parquet_file_path)
+        else:
+            insert_data_to_db(pd.read_parquet(parquet_file_path), db_path)
+
+    # Carga en paralelo: cada proceso lee sus particiones Parquet y las escribe en su staging
+    if partition_paths:
+        insert_data_to_db_sharded(partition_paths, db_path, load_workers)
+
+
+def get_date_windows(start_date: date, end_date: date, window) -> List[List[date]]:
+    """
+    Divide el rango [start_date, end_date] en ventanas consecutivas de fechas.
+    La ventana puede ser 'week' (7 días), 'month' (mes calendario) o un número de días.
+    """
+    windows = []
+    current = start_date
+    while current <= end_date:
+        if window == "month":
+            next_start = date(current.year + 1, 1, 1) if current.month == 12 else date(current.year, current.month + 1, 1)
+        elif window == "week":
+            next_start = current + timedelta(days=7)
+        elif isinstance(window, int) and window > 0:
+            next_start = current + timedelta(days=window)
+        else:
+            raise ValueError(f"Ventana no soportada: {window}. Opciones: 'week', 'month' o un número de días")
+
+        window_end = min(next_start - timedelta(days=1), end_date)
+        windows.append([current + timedelta(days=i) for i in range((window_end - current).days + 1)])
+        current = next_start
+    return windows
+
 def get_all_dates_for_month(year: int, month: int) -> List[date]:
     """
     Calcula y retorna una lista con todas las fechas (objetos datetime.date) de un mes y año dados.
@@ -0,0 +1,119 @@
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.client import HTTPException
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(name)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+logger = logging.getLogger(__name__)
+
+GENRES = ["Drama", "Comedy", "Action", "Anime", "Reality", "Crime", "Romance", "Documentary"]
+
+
+def build_request_paths(total: int, start: date, days: int, seed: int = 42) -> list:
+    """
+    Genera una mezcla de peticiones sobre los endpoints del servicio de consultas.
+    Los rangos de fechas y géneros se repiten, como en un uso real, de modo que la
+    caché de resultados tenga aciertos.
+    """
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(total):
+        choice = rng.random()
+        if choice < 0.5:
+            first = start + timedelta(days=rng.randrange(days))
+            last = first + timedelta(days=rng.randrange(1, 8))
+            paths.append("/episodes?" + urlencode({"start": first.isoformat(), "end": last.isoformat()}))
+        elif choice < 0.8:
+            paths.append("/shows?" + urlencode({"genre": rng.choice(GENRES)}))
+        elif choice < 0.95:
+            paths.append("/channels/stats")
+        else:
+            paths.append("/aggregations")
+    return paths
+
+
+def timed_request(base_url: str, path: str) -> tuple:
+    """
+    Realiza una petición GET y retorna (latencia en segundos, código HTTP). Los errores de
+    conexión (cola de conexiones llena, conexión reiniciada, timeout) o las respuestas
+    incompletas se registran con código 0 para que la prueba continúe midiendo.
+    """
+    started = time.perf_counter()
+    try:
+        with urlopen(base_url + path, timeout=30) as response:
+            json.loads(response.read())
+            status = response.status
+    except HTTPError as e:
+        status = e.code
+    except (OSError, HTTPException, ValueError) as e:
+        logger.debug(f"Error en la petición {path}: {e}")
+        status = 0
+    return time.perf_counter() - started, status
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Percentil por el método del rango más cercano sobre una lista ordenada"""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_load_test(base_url: str, total: int, concurrency: int, start: date, days: int) -> dict:
+    """
+    Envía 'total' peticiones con 'concurrency' clientes simultáneos y retorna el
+    throughput (QPS) y la latencia (p50, p95, p99 y máxima, en milisegundos).
+    """
+    paths = build_request_paths(total, start, days)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda path: timed_request(base_url, path), paths))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    errors = sum(1 for _, status in results if status != 200)
+    return {
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "qps": total / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de consultas")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="URL base del servicio")
+    parser.add_argument("--requests", type=int, default=2000, help="Cantidad total de peticiones")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultáneos")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2024, 1, 1),
+                        help="Primera fecha de los rangos consultados")
+    parser.add_argument("--days", type=int, default=31, help="Cantidad de días cubiertos por los rangos")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(args.url.rstrip("/"), args.requests, args.concurrency, args.start, args.days)
+    logger.info(f"Peticiones: {report['requests']} (errores: {report['errors']}), "
+                f"concurrencia: {report['concurrency']}")
+    logger.info(f"QPS: {report['qps']:.1f}")
+    logger.info(f"Latencia (ms): p50={report['p50_ms']:.2f} p95={report['p95_ms']:.2f} "
+                f"p99={report['p99_ms']:.2f} max={report['max_ms']:.2f}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Consultas parametrizadas: al ser siempre el mismo texto SQL, cada conexión reutiliza
+# la sentencia preparada desde su caché de sentencias
+EPISODES_BY_DATE_SQL = '''
+    SELECT e.id, e.show_id, s.name AS show_name, e.name, e.season, e.number, e.type,
+           e.airdate, e.airtime, e.runtime, e.source
+    FROM episodes e
+    LEFT JOIN shows s ON s.id = e.show_id
+    WHERE e.airdate BETWEEN ? AND ?
+    ORDER BY e.airdate, e.id
+    LIMIT ? OFFSET ?
+'''
+
+SHOWS_BY_GENRE_SQL = '''
+    SELECT s.id, s.name, s.type, s.language, s.status, s.average_runtime, s.premiered,
+           s.official_site, wc.name AS web_channel
+    FROM shows s
+    LEFT JOIN web_channels wc ON wc.id = s.web_channel_id
+    WHERE s.id IN (
+        SELECT sg.show_id
+        FROM show_genre sg
+        JOIN genres g ON g.id = sg.genre_id
+        WHERE g.name = ? COLLATE NOCASE
+    )
+    ORDER BY s.name, s.id
+    LIMIT ? OFFSET ?
+'''
+
+CHANNEL_STATS_SQL = '''
+    SELECT wc.id, wc.name, wc.country_code,
+           COUNT(DISTINCT s.id) AS shows,
+           COUNT(e.id) AS episodes,
+           AVG(e.runtime) AS average_episode_runtime
+    FROM web_channels wc
+    LEFT JOIN shows s ON s.web_channel_id = wc.id
+    LEFT JOIN episodes e ON e.show_id = s.id
+    GROUP BY wc.id, wc.name, wc.country_code
+    ORDER BY episodes DESC, wc.name
+'''
+
+# Equivalentes en SQL de analysis.run_aggregations (calculadas por episodio).
+# Las bases cargadas antes de que load.get_genre_id usara crc32 pueden tener varios ids por
+# género (derivados de hash()), por lo que se agrupa por nombre y se cuentan episodios distintos
+AVERAGE_RUNTIME_SQL = '''
+    SELECT AVG(s.average_runtime) AS average_runtime
+    FROM episodes e
+    JOIN shows s ON s.id = e.show_id
+'''
+
+GENRE_COUNTS_SQL = '''
+    SELECT g.name AS genre, COUNT(DISTINCT e.id) AS count
+    FROM episodes e
+    JOIN show_genre sg ON sg.show_id = e.show_id
+    JOIN genres g ON g.id = sg.genre_id
+    GROUP BY g.name
+    ORDER BY count DESC, g.name
+'''
+
+OFFICIAL_SITES_SQL = '''
+    SELECT DISTINCT s.official_site
+    FROM episodes e
+    JOIN shows s ON s.id = e.show_id
+    WHERE s.official_site IS NOT NULL
+'''
+
+
+class QueryError(ValueError):
+    """Parámetros inválidos en una consulta (se responde con HTTP 400)"""
+
+
+class ReadOnlyConnectionPool:
+    """
+    Conjunto fijo de conexiones SQLite de solo lectura compartidas entre los hilos del servidor.
+    La base de datos está en modo WAL (ver load.create_database_tables), por lo que las
+    lecturas no se bloquean mientras el cargador escribe.
+    """
+
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                               check_same_thread=False, cached_statements=128)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+class LRUResultCache:
+    """
+    Caché LRU de resultados de consultas, segura para varios hilos.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class QueryService:
+    """
+    Consultas de solo lectura sobre la base de datos cargada (shows, episodes, genres y
+    web_channels). Los resultados se guardan en una caché LRU que se invalida cuando el
+    cargador confirma una transacción, detectado mediante PRAGMA data_version.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = DEFAULT_POOL_SIZE, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.pool = ReadOnlyConnectionPool(db_path, pool_size)
+        self.cache = LRUResultCache(cache_size)
+
+        # Conexión dedicada para observar PRAGMA data_version, que cambia cuando
+        # otra conexión (el cargador) confirma cambios en la base de datos
+        self._version_conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._version_lock = threading.Lock()
+        self._data_version = self._read_data_version()
+
+    def _read_data_version(self):
+        return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _invalidate_if_changed(self):
+        """Limpia la caché si la base de datos cambió; retorna la versión de datos vigente"""
+        with self._version_lock:
+            current = self._read_data_version()
+            if current != self._data_version:
+                logger.info("La base de datos cambió; se invalida la caché de resultados")
+                self._data_version = current
+                self.cache.clear()
+            return current
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        # La versión forma parte de la clave: un resultado calculado antes de un commit del
+        # cargador y guardado después de limpiar la caché no se sirve con la versión nueva
+        version = self._invalidate_if_changed()
+        key = (version, sql, params)
+        rows = self.cache.get(key)
+        if rows is None:
+            with self.pool.connection() as conn:
+                rows = [dict(row) for row in conn.execute(sql, params)]
+            if self._data_version == version:
+                self.cache.put(key, rows)
+        return rows
+
+    def episodes_by_date(self, start: str, end: str, limit: int = DEFAULT_LIMIT, offset: int = 0) -> list:
+        """Episodios emitidos entre dos fechas (inclusive)"""
+        start, end = parse_date_param(start, "start"), parse_date_param(end, "end")
+        if start > end:
+            raise QueryError("'start' debe ser anterior o igual a 'end'")
+        limit, offset = parse_paging(limit, offset)
+        return self._query(EPISODES_BY_DATE_SQL, (start.isoformat(), end.isoformat(), limit, offset))
+
+    def shows_by_genre(self, genre: str, limit: int = DEFAULT_LIMIT, offset: int = 0) -> list:
+        """Shows asociados a un género"""
+        if not genre:
+            raise QueryError("El parámetro 'genre' es obligatorio")
+        limit, offset = parse_paging(limit, offset)
+        return self._query(SHOWS_BY_GENRE_SQL, (genre, limit, offset))
+
+    def channel_stats(self) -> list:
+        """Cantidad de shows, episodios y runtime promedio por canal web"""
+        return self._query(CHANNEL_STATS_SQL)
+
+    def aggregations(self) -> dict:
+        """Resultados de analysis.run_aggregations calculados sobre la base de datos"""
+        average_runtime = self._query(AVERAGE_RUNTIME_SQL)[0]["average_runtime"]
+        genre_counts = self._query(GENRE_COUNTS_SQL)
+        domains = {urlparse(row["official_site"]).netloc for row in self._query(OFFICIAL_SITES_SQL)}
+        return {
+            "average_runtime": average_runtime,
+            "shows_by_genre": genre_counts,
+            "unique_domains": sorted(domain for domain in domains if domain),
+        }
+
+    def close(self):
+        self.pool.close()
+        self._version_conn.close()
+
+
+def parse_date_param(value, name: str) -> date:
+    """Valida un parámetro de fecha en formato YYYY-MM-DD"""
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise QueryError(f"El parámetro '{name}' debe tener formato YYYY-MM-DD")
+
+
+def parse_paging(limit, offset) -> tuple:
+    """Valida los parámetros de paginación"""
+    try:
+        limit, offset = int(limit), int(offset)
+    except (TypeError, ValueError):
+        raise QueryError("'limit' y 'offset' deben ser números enteros")
+    if not 0 < limit <= MAX_LIMIT or offset < 0:
+        raise QueryError(f"'limit' debe estar entre 1 y {MAX_LIMIT} y 'offset' no puede ser negativo")
+    return limit, offset
+
+
+def make_handler(service: QueryService):
+    """Crea la clase manejadora HTTP asociada al servicio de consultas"""
+
+    class QueryRequestHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            paging = {key: params[key] for key in ("limit", "offset") if key in params}
+            try:
+                if url.path == "/episodes":
+                    body = service.episodes_by_date(params.get("start"), params.get("end"), **paging)
+                elif url.path == "/shows":
+                    body = service.shows_by_genre(params.get("genre"), **paging)
+                elif url.path == "/channels/stats":
+                    body = service.channel_stats()
+                elif url.path == "/aggregations":
+                    body = service.aggregations()
+                else:
+                    self._send_json(404, {"error": f"Ruta no encontrada: {url.path}"})
+                    return
+            except QueryError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except sqlite3.Error as e:
+                logger.error(f"Error al consultar la base de datos: {e}")
+                self._send_json(500, {"error": "Error al consultar la base de datos"})
+                return
+            self._send_json(200, body)
+
+        def _send_json(self, status: int, body):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return QueryRequestHandler
+
+
+class QueryHTTPServer(ThreadingHTTPServer):
+    """Servidor HTTP multihilo con una cola de conexiones pendientes amplia"""
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def create_server(db_path: str, host: str = "127.0.0.1", port: int = 8000,
+                  pool_size: int = DEFAULT_POOL_SIZE, cache_size: int = DEFAULT_CACHE_SIZE) -> ThreadingHTTPServer:
+    """Crea el servidor HTTP/JSON de consultas sobre la base de datos SQLite"""
+    service = QueryService(db_path, pool_size, cache_size)
+    server = QueryHTTPServer((host, port), make_handler(service))
+    server.service = service
+    return server
+
+
+def serve(db_path: str, host: str = "127.0.0.1", port: int = 8000,
+          pool_size: int = DEFAULT_POOL_SIZE, cache_size: int = DEFAULT_CACHE_SIZE):
+    """Atiende consultas hasta que se interrumpa el proceso"""
+    server = create_server(db_path, host, port, pool_size, cache_size)
+    logger.info(f"Servicio de consultas disponible en http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Deteniendo el servicio de consultas...")
+    finally:
+        server.server_close()
+        server.service.close()
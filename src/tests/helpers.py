@@ -0,0 +1,10 @@
+import pandas as pd
+
+
+def build_dataframe(records):
+    """DataFrame con las columnas y listas como las deja perform_data_cleaning"""
+    df = pd.json_normalize(records, sep='.')
+    df.columns = [col.lower() for col in df.columns]
+    for column in ['_embedded.show.genres', '_embedded.show.schedule.days']:
+        df[column] = df[column].apply(lambda x: ', '.join(x) if isinstance(x, list) else '')
+    return df
@@ -0,0 +1,163 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import pandas as pd
+import os
+import sys
+import time
+import tempfile
+import requests
+
+# Se sube dos niveles desde la ubicación actual (tests/) hasta llegar a la raíz del proyecto
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.enrichment import (ShowEntityStore, enrich_shows, fetch_show, find_shows_to_fetch, build_enrichment_dataframe,
+                            SHOW_URL, MAX_RETRIES, RATE_LIMIT_WINDOW_SECONDS)
+
+
+def make_show(show_id, updated=100):
+    """Show completo de ejemplo, como lo retorna /shows/{id} con reparto y temporadas"""
+    return {
+        "id": show_id, "name": f"Show {show_id}", "updated": updated,
+        "_embedded": {"cast": [{"person": {"name": "Actor"}}], "seasons": [{"id": 1}, {"id": 2}]}
+    }
+
+
+def mock_api(updates=None, not_found=()):
+    """Simula requests.get para /shows/{id} y /updates/shows"""
+    def fake_get(url, timeout=None):
+        response = MagicMock()
+        response.status_code = 200
+        if "/updates/shows" in url:
+            response.json.return_value = {str(k): v for k, v in (updates or {}).items()}
+        else:
+            show_id = int(url.split("/shows/")[1].split("?")[0])
+            if show_id in not_found:
+                response.status_code = 404
+                response.raise_for_status.side_effect = requests.HTTPError("404 Not Found")
+            response.json.return_value = make_show(show_id)
+        return response
+    return fake_get
+
+
+class TestEnrichment(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.tmpdir.name, "show_entities.db")
+        self.df = pd.DataFrame({'_embedded.show.id': [1, 2, 2, 3]})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @patch('src.enrichment.requests.get')
+    def test_enrich_shows_uses_store_on_repeat_runs(self, mock_get):
+        """
+        Test que verifica que solo se descarguen los shows distintos y que una segunda
+        ejecución se resuelva desde el almacén local sin peticiones a la API
+        """
+        mock_get.side_effect = mock_api()
+
+        shows = enrich_shows(self.df, self.store_path)
+        self.assertEqual(sorted(shows), [1, 2, 3])
+        self.assertEqual(mock_get.call_count, 3)
+
+        mock_get.reset_mock()
+        shows = enrich_shows(self.df, self.store_path)
+        self.assertEqual(sorted(shows), [1, 2, 3])
+        mock_get.assert_not_called()
+
+    @patch('src.enrichment.requests.get')
+    def test_find_shows_to_fetch_invalidates_only_updated(self, mock_get):
+        """
+        Test que verifica que, vencido el TTL, solo se vuelvan a descargar los shows
+        modificados según /updates/shows
+        """
+        mock_get.side_effect = mock_api(updates={1: 200, 2: 100})
+        now = time.time()
+
+        store = ShowEntityStore(self.store_path)
+        store.put_many([make_show(1), make_show(2), make_show(3)], fetched_at=now - 2 * 86400)
+
+        to_fetch = find_shows_to_fetch(store, [1, 2, 3, 4], ttl=86400, since="week", now=now)
+
+        # 4 no está almacenado y 1 cambió; 2 y 3 quedan verificados
+        self.assertEqual(to_fetch, [4, 1])
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(store.get_metadata([3])[3][1], now)
+        store.close()
+
+    @patch('src.enrichment.requests.get')
+    def test_missing_shows_are_not_refetched_until_ttl(self, mock_get):
+        """
+        Test que verifica que un show inexistente (404) se registre como entrada negativa y
+        no se vuelva a pedir hasta que venza el TTL, aunque no aparezca en /updates/shows
+        """
+        mock_get.side_effect = mock_api(updates={1: 100, 2: 100}, not_found={3})
+
+        shows = enrich_shows(self.df, self.store_path)
+        self.assertEqual(sorted(shows), [1, 2])
+        self.assertEqual(mock_get.call_count, 3)
+
+        mock_get.reset_mock()
+        enrich_shows(self.df, self.store_path)
+        mock_get.assert_not_called()
+
+        store = ShowEntityStore(self.store_path)
+        # Vencido el TTL, 1 y 2 no cambiaron según el feed y la entrada negativa se reintenta
+        to_fetch = find_shows_to_fetch(store, [1, 2, 3], ttl=0, since="week", now=time.time() + 1)
+        self.assertEqual(to_fetch, [3])
+        store.close()
+
+    @patch('src.enrichment.time.sleep')
+    @patch('src.enrichment.requests.get')
+    def test_fetch_show_does_not_sleep_after_last_retry(self, mock_get, mock_sleep):
+        """
+        Test que verifica que ante respuestas 429 persistentes se respete Retry-After (o la
+        ventana del límite de peticiones) y no se espere tras el último intento
+        """
+        mock_get.return_value = MagicMock(status_code=429, headers={"Retry-After": "15"})
+
+        self.assertIsNone(fetch_show(1))
+        self.assertEqual(mock_get.call_count, MAX_RETRIES)
+        waits = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertEqual(len(waits), MAX_RETRIES - 1)
+        self.assertEqual(waits[0], 15)
+        self.assertTrue(all(wait >= RATE_LIMIT_WINDOW_SECONDS for wait in waits))
+
+    @patch('src.enrichment.time.sleep')
+    @patch('src.enrichment.requests.get')
+    def test_transient_errors_are_retried_and_not_stored(self, mock_get, mock_sleep):
+        """
+        Test que verifica que un timeout se reintente y que un show que sigue fallando no
+        se guarde como entrada negativa, para pedirlo de nuevo en la siguiente ejecución
+        """
+        fake_get = mock_api()
+        mock_get.side_effect = [requests.Timeout("timeout"), fake_get(SHOW_URL.format(show_id=1))]
+        self.assertEqual(fetch_show(1)["id"], 1)
+
+        def failing_get(url, timeout=None):
+            if "/shows/3" in url:
+                raise requests.ConnectionError("connection reset")
+            return fake_get(url)
+
+        mock_get.side_effect = failing_get
+        shows = enrich_shows(self.df, self.store_path)
+        self.assertEqual(sorted(shows), [1, 2])
+
+        store = ShowEntityStore(self.store_path)
+        self.assertEqual(sorted(store.get_metadata([1, 2, 3])), [1, 2])
+        store.close()
+
+    def test_build_enrichment_dataframe(self):
+        """
+        Test que verifica el resumen de reparto y temporadas por show
+        """
+        df = build_enrichment_dataframe({7: make_show(7)})
+
+        self.assertEqual(df['id'].iloc[0], 7)
+        self.assertEqual(df['cast_count'].iloc[0], 1)
+        self.assertEqual(df['season_count'].iloc[0], 2)
+        self.assertEqual(df['cast'].iloc[0], "Actor")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,7 +10,8 @@ from requests import RequestException
 # Se sube dos niveles desde la ubicación actual (tests/) hasta llegar a la raíz del proyecto
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from src.extraction import fetch_tvmaze_schedule, save_json_response
+from src.extraction import (fetch_tvmaze_schedule, save_json_response, save_json_records,
+                            iter_json_array, iter_json_file, stream_tvmaze_full_schedule)
 
 # Construye la ruta al archivo de mock que contiene la respuesta de ejemplo
 data_path = os.path.join(os.path.dirname(__file__), 'mock_response.json')
@@ -62,6 +63,92 @@ class TestExtraction(unittest.TestCase):
         # Se verifica que el resultado sea una lista vacía
         self.assertEqual(result, [])
 
+    @patch('src.extraction.requests.get')
+    def test_fetch_tvmaze_network_schedule(self, mock_get):
+        """
+        Test que verifica que el endpoint de cadenas de TV (/schedule) use el país en la URL,
+        mueva 'show' a '_embedded.show' y etiquete el origen de los registros
+        """
+        network_record = {"id": 1, "name": "Pilot", "show": {"id": 10, "name": "Show", "network": {"id": 5}}}
+        mock_response = MagicMock()
+        mock_response.json.return_value = [network_record]
+        mock_get.return_value = mock_response
+
+        result = fetch_tvmaze_schedule(date(2024, 1, 2), endpoint="network", country="US")
+
+        mock_get.assert_called_once_with("http://api.tvmaze.com/schedule?country=US&date=2024-01-02", timeout=50)
+        self.assertEqual(result[0]["_source"], "network")
+        self.assertNotIn("show", result[0])
+        self.assertEqual(result[0]["_embedded"]["show"]["network"]["id"], 5)
+
+    def test_iter_json_array_chunked(self):
+        """
+        Test que verifica que el arreglo JSON se decodifique correctamente aunque los
+        elementos lleguen partidos entre varios fragmentos
+        """
+        payload = json.dumps(SAMPLE_JSON + [{"id": 2, "name": "Episodio, \"2\" [b]"}], ensure_ascii=False)
+        chunks = [payload[i:i + 7] for i in range(0, len(payload), 7)]
+
+        result = list(iter_json_array(chunks))
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0]["id"], 2719122)
+        self.assertEqual(result[1]["name"], 'Episodio, "2" [b]')
+
+    def test_iter_json_file(self):
+        """
+        Test que verifica que un archivo guardado con save_json_records se lea de forma
+        incremental, en fragmentos más pequeños que cada registro
+        """
+        records = [dict(SAMPLE_JSON[0], id=i) for i in range(3)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            save_json_records(records, tmpdir, "full.json")
+            result = list(iter_json_file(os.path.join(tmpdir, "full.json"), chunk_size=16))
+
+        self.assertEqual([record["id"] for record in result], [0, 1, 2])
+
+    @patch('src.extraction.requests.get')
+    def test_stream_tvmaze_full_schedule(self, mock_get):
+        """
+        Test que verifica que /schedule/full se procese en streaming y se guarde registro a registro
+        """
+        payload = json.dumps(SAMPLE_JSON)
+        mock_response = MagicMock()
+        mock_response.iter_content.return_value = [payload[i:i + 100] for i in range(0, len(payload), 100)]
+        mock_get.return_value.__enter__.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            count = save_json_records(stream_tvmaze_full_schedule(), tmpdir, "full.json")
+
+            with open(os.path.join(tmpdir, "full.json"), 'r', encoding='utf-8') as f:
+                content = json.load(f)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(content[0]["id"], 2719122)
+        self.assertEqual(content[0]["_source"], "full")
+        mock_get.assert_called_once_with("http://api.tvmaze.com/schedule/full", timeout=50, stream=True)
+
+    @patch('src.extraction.requests.get')
+    def test_stream_tvmaze_full_schedule_interrupted(self, mock_get):
+        """
+        Test que verifica que si la conexión se corta a mitad de /schedule/full se relance
+        el error y no quede un archivo JSON truncado
+        """
+        payload = json.dumps(SAMPLE_JSON + SAMPLE_JSON)
+
+        def interrupted_chunks(*args, **kwargs):
+            yield payload[:len(payload) // 2 + 10]
+            raise RequestException("Connection reset")
+
+        mock_response = MagicMock()
+        mock_response.iter_content.side_effect = interrupted_chunks
+        mock_get.return_value.__enter__.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.assertRaises(RequestException):
+                save_json_records(stream_tvmaze_full_schedule(), tmpdir, "full.json")
+            self.assertEqual(os.listdir(tmpdir), [])
+
     def test_save_json_response(self):
         """
         Test que verifica que la función save_json_response guarde correctamente el archivo JSON
@@ -84,5 +171,18 @@ class TestExtraction(unittest.TestCase):
             # Comprobamos que el contenido del archivo sea idéntico a los datos de prueba
             self.assertEqual(content, test_data)
 
+    def test_save_json_response_network_does_not_overwrite_web(self):
+        """
+        Test que verifica que los archivos de cadenas de TV y de canales web del mismo día
+        se guarden en archivos distintos
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            test_day = date(2024, 1, 2)
+            save_json_response([{"id": 1}], tmpdir, test_day)
+            save_json_response([{"id": 2}], tmpdir, test_day, endpoint="network", country="us")
+
+            self.assertEqual(sorted(os.listdir(tmpdir)),
+                             ["data_tvmaze_2024-01-02.json", "data_tvmaze_network_US_2024-01-02.json"])
+
 if __name__ == '__main__':
     unittest.main()
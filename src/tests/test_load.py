@@ -4,11 +4,15 @@ import pandas as pd
 import json
 import os
 import sys
+import sqlite3
+import tempfile
 
 # Se sube dos niveles desde la ubicación actual (tests/) hasta llegar a la raíz del proyecto
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from src.load import save_as_parquet
+from src.load import save_as_parquet, create_database_tables, insert_data_to_db, insert_data_to_db_sharded, \
+    split_into_shards
+from src.tests.helpers import build_dataframe
 
 # Construye la ruta al archivo de mock que contiene la respuesta de ejemplo
 data_path = os.path.join(os.path.dirname(__file__), 'mock_response.json')
@@ -36,5 +40,106 @@ class TestSaveAsParquet(unittest.TestCase):
         # Verificar que el mensaje de log se haya registrado correctamente
         mock_logger.info.assert_called_once_with(f"Archivo Parquet guardado en: {parquet_file_path}")
 
+class TestInsertDataToDb(unittest.TestCase):
+
+    def test_insert_web_and_network_episodes(self):
+        """
+        Test que verifica que se carguen tanto episodios web como de cadenas de TV,
+        registrando la cadena y el origen de cada episodio
+        """
+        network_record = {
+            "id": 1, "name": "Pilot", "_source": "network",
+            "_embedded": {"show": {"id": 10, "name": "Show", "genres": ["Drama"],
+                                   "network": {"id": 5, "name": "NBC", "officialSite": None,
+                                               "country": {"code": "US", "name": "United States",
+                                                           "timezone": "America/New_York"}}}}
+        }
+        df = build_dataframe(SAMPLE_JSON + [network_record])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            create_database_tables(db_path)
+            insert_data_to_db(df, db_path)
+
+            conn = sqlite3.connect(db_path)
+            sources = dict(conn.execute("SELECT id, source FROM episodes").fetchall())
+            network_id = conn.execute("SELECT network_id FROM shows WHERE id = 10").fetchone()[0]
+            network_name = conn.execute("SELECT name FROM networks WHERE id = 5").fetchone()[0]
+            conn.close()
+
+        self.assertEqual(sources, {2719122: "web", 1: "network"})
+        self.assertEqual(network_id, 5)
+        self.assertEqual(network_name, "NBC")
+
+    def test_sharded_load_matches_single_writer(self):
+        """
+        Test que verifica que la carga en paralelo por shards (staging y fusión con ATTACH)
+        produzca el mismo contenido que la carga con un único escritor
+        """
+        # El mismo show aparece con un nombre distinto en cada mes: ambas cargas deben
+        # conservar la versión del primer episodio (enero)
+        records = []
+        for i, airdate in enumerate(["2024-01-02", "2024-02-10", "2024-03-15", "2024-03-20"]):
+            show = dict(SAMPLE_JSON[0]['_embedded']['show'], name=f"Show v{i}")
+            records.append(dict(SAMPLE_JSON[0], id=i + 1, airdate=airdate, _embedded={'show': show}))
+        df = build_dataframe(records)
+        df['airdate'] = pd.to_datetime(df['airdate'])
+
+        tables = ['country', 'web_channels', 'shows', 'episodes', 'genres']
+        contents = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, loader in [("single", insert_data_to_db),
+                                 ("sharded", lambda data, path: insert_data_to_db_sharded(data, path, workers=2))]:
+                db_path = os.path.join(tmpdir, f"{name}.db")
+                create_database_tables(db_path)
+                loader(df, db_path)
+
+                conn = sqlite3.connect(db_path)
+                contents.append({table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall())
+                                 for table in tables})
+                contents[-1]['show_genre'] = sorted(conn.execute("SELECT show_id, genre_id FROM show_genre").fetchall())
+                conn.close()
+
+            # Las bases de staging se eliminan al terminar la carga
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["sharded.db", "single.db"])
+
+        self.assertEqual(contents[0], contents[1])
+        self.assertEqual(len(contents[1]['episodes']), 4)
+        self.assertEqual([show[2] for show in contents[1]['shows']], ["Show v0"])
+
+    def test_single_month_is_split_across_shards(self):
+        """
+        Test que verifica que los episodios de un solo mes se repartan en rangos
+        consecutivos de filas, uno por proceso
+        """
+        df = pd.DataFrame({'id': range(5), 'airdate': pd.to_datetime(['2024-01-01'] * 5)})
+
+        shards = split_into_shards(df, 2)
+        self.assertEqual([list(shard[0]['id']) for shard in shards], [[0, 1], [2, 3, 4]])
+        self.assertEqual(split_into_shards(df.iloc[0:0], 2), [])
+
+    def test_sharded_load_skips_bad_rows(self):
+        """
+        Test que verifica que una fila que SQLite no puede insertar se omita sin descartar
+        el resto del shard, igual que en la carga con un único escritor
+        """
+        records = [dict(SAMPLE_JSON[0], id=i + 1, airdate="2024-01-02") for i in range(3)]
+        df = build_dataframe(records)
+        # Un diccionario no es un tipo soportado por sqlite3
+        df['name'] = df['name'].astype(object)
+        df.at[1, 'name'] = {'invalido': True}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "sharded.db")
+            create_database_tables(db_path)
+            insert_data_to_db_sharded(df, db_path, workers=2)
+
+            conn = sqlite3.connect(db_path)
+            episode_ids = [row[0] for row in conn.execute("SELECT id FROM episodes ORDER BY id")]
+            conn.close()
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["sharded.db"])
+
+        self.assertEqual(episode_ids, [1, 3])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import json
+from datetime import date
+from unittest import mock
+
+# Se sube dos niveles desde la ubicación actual (tests/) hasta llegar a la raíz del proyecto
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src import main_etl
+from src.main_etl import build_parser, get_date_windows
+
+SRC_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# main_etl importa las etapas de forma diferida como módulos de src/
+sys.path.insert(0, SRC_FOLDER)
+
+# Presupuesto de tiempo de importación de main_etl (microsegundos, acumulado)
+IMPORT_TIME_BUDGET_US = 150_000
+
+HEAVY_MODULES = ['pandas', 'pyarrow', 'bs4', 'ydata_profiling', 'matplotlib', 'scipy']
+
+
+def run_python(*args):
+    """Ejecuta un intérprete nuevo desde src/ para medir importaciones en frío"""
+    return subprocess.run([sys.executable, *args], cwd=SRC_FOLDER, capture_output=True, text=True, check=True)
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_time_budget(self):
+        """
+        Test que verifica con 'python -X importtime' que importar main_etl se mantenga
+        dentro del presupuesto de tiempo
+        """
+        result = run_python("-X", "importtime", "-c", "import main_etl")
+
+        match = re.search(r"import time:\s+\d+ \|\s+(\d+) \| main_etl$", result.stderr, re.MULTILINE)
+        self.assertIsNotNone(match)
+        self.assertLess(int(match.group(1)), IMPORT_TIME_BUDGET_US)
+
+    def test_heavy_dependencies_are_lazy(self):
+        """
+        Test que verifica que las dependencias pesadas no se carguen al importar la CLI
+        ni los módulos que no las necesitan durante la importación
+        """
+        code = ("import sys, main_etl, extraction; print(','.join(m for m in %r if m in sys.modules))"
+                % HEAVY_MODULES)
+        self.assertEqual(run_python("-c", code).stdout.strip(), "")
+
+        code = "import sys, transform, analysis; print(','.join(m for m in %r if m in sys.modules))"
+        loaded = run_python("-c", code % ['bs4', 'ydata_profiling', 'matplotlib']).stdout.strip()
+        self.assertEqual(loaded, "")
+
+
+class TestCli(unittest.TestCase):
+
+    def test_parse_run_backfill(self):
+        args = build_parser().parse_args(['run', '--backfill', '--start', '2020-01-01',
+                                          '--end', '2021-12-31', '--window', 'week'])
+        self.assertEqual(args.command, 'run')
+        self.assertTrue(args.backfill)
+        self.assertEqual(args.start, date(2020, 1, 1))
+        self.assertEqual(args.window, 'week')
+
+    def test_rejects_reversed_date_range(self):
+        """
+        Test que verifica que la CLI rechace un rango con --end anterior a --start en lugar
+        de ejecutar el backfill sin fechas, y las opciones que el backfill no admite
+        """
+        for argv in (['run', '--backfill', '--start', '2024-02-01', '--end', '2024-01-01'],
+                     ['extract', '--start', '2024-02-01'],
+                     ['run', '--backfill', '--no-enrich']):
+            with self.assertRaises(SystemExit) as context, mock.patch('sys.stderr'):
+                main_etl.main(argv)
+            self.assertEqual(context.exception.code, 2)
+
+    def test_backfill_does_not_save_failed_days(self):
+        """
+        Test que verifica que un día cuya extracción falla no se guarde como día sin
+        episodios, de modo que al reanudar el backfill se vuelva a pedir
+        """
+        import requests
+
+        def fake_get(url, timeout=None):
+            if "2024-01-02" in url:
+                raise requests.ConnectionError("connection reset")
+            return mock.MagicMock(status_code=200, json=mock.MagicMock(return_value=[]))
+
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch("requests.get", side_effect=fake_get):
+            with self.assertRaises(RuntimeError):
+                main_etl.run_backfill(date(2024, 1, 1), date(2024, 1, 3), "week", tmpdir,
+                                      os.path.join(tmpdir, "backfill"), os.path.join(tmpdir, "test.db"))
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["data_tvmaze_2024-01-01.json", "data_tvmaze_2024-01-03.json"])
+
+    def test_backfill_uses_requested_endpoint(self):
+        """
+        Test que verifica que el backfill extraiga el endpoint y país solicitados
+        """
+        requested_urls = []
+
+        def fake_get(url, timeout=None):
+            requested_urls.append(url)
+            return mock.MagicMock(status_code=200, json=mock.MagicMock(return_value=[]))
+
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch("requests.get", side_effect=fake_get):
+            main_etl.run_backfill(date(2024, 1, 1), date(2024, 1, 1), "week", tmpdir, os.path.join(tmpdir, "backfill"),
+                                  os.path.join(tmpdir, "test.db"), endpoint="network", country="US")
+            self.assertIn("data_tvmaze_network_US_2024-01-01.json", os.listdir(tmpdir))
+
+        self.assertEqual(requested_urls, ["http://api.tvmaze.com/schedule?country=US&date=2024-01-01"])
+
+    def test_backfill_full_schedule_by_windows(self):
+        """
+        Test que verifica que el backfill con /schedule/full arme cada ventana leyendo el
+        archivo completo de forma incremental y filtrando por 'airdate'
+        """
+        import pandas as pd
+        from extraction import save_json_records
+
+        with open(os.path.join(os.path.dirname(__file__), 'mock_response.json'), encoding='utf-8') as f:
+            sample = json.load(f)[0]
+        records = [dict(sample, id=i, airdate=f"2024-01-{day:02d}", _source="full")
+                   for i, day in enumerate([1, 2, 9, 20], start=1)]
+
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch("requests.get") as mock_get:
+            json_folder, dataset_path = os.path.join(tmpdir, "json"), os.path.join(tmpdir, "backfill")
+            os.makedirs(json_folder)
+            save_json_records(records, json_folder, f"data_tvmaze_full_{date.today().isoformat()}.json")
+
+            main_etl.run_backfill(date(2024, 1, 1), date(2024, 1, 14), "week", json_folder, dataset_path,
+                                  os.path.join(tmpdir, "test.db"), endpoint="full")
+
+            mock_get.assert_not_called()
+            self.assertEqual(sorted(os.listdir(dataset_path)), ["window=2024-01-01", "window=2024-01-08"])
+            self.assertEqual(sorted(pd.read_parquet(dataset_path)['id']), [1, 2, 3])
+
+    def test_get_date_windows(self):
+        # Ventanas mensuales: el primer y el último mes quedan recortados al rango
+        windows = get_date_windows(date(2023, 12, 15), date(2024, 2, 3), 'month')
+        self.assertEqual([len(window) for window in windows], [17, 31, 3])
+        self.assertEqual(windows[1][0], date(2024, 1, 1))
+
+        # Ventanas de un número fijo de días
+        windows = get_date_windows(date(2024, 1, 1), date(2024, 1, 10), 4)
+        self.assertEqual([len(window) for window in windows], [4, 4, 2])
+
+    def test_raw_files_only_for_requested_dates(self):
+        """
+        Test que verifica que la ejecución mensual lea solo los archivos de sus fechas y
+        endpoint, ignorando otros meses, otros orígenes y la extracción completa
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for filename in ["data_tvmaze_2024-01-01.json", "data_tvmaze_2023-12-31.json",
+                             "data_tvmaze_network_US_2024-01-01.json", "data_tvmaze_full_2024-01-15.json"]:
+                open(os.path.join(tmpdir, filename), "w").close()
+
+            with mock.patch.object(main_etl, "JSON_FOLDER", tmpdir):
+                files = main_etl.get_raw_json_files([date(2024, 1, 1), date(2024, 1, 2)])
+                self.assertEqual([os.path.basename(file) for file in files], ["data_tvmaze_2024-01-01.json"])
+
+                files = main_etl.get_raw_json_files([date(2024, 1, 1)], "network", "US")
+                self.assertEqual([os.path.basename(file) for file in files], ["data_tvmaze_network_US_2024-01-01.json"])
+
+                files = main_etl.get_raw_json_files([], "full")
+                self.assertEqual([os.path.basename(file) for file in files], ["data_tvmaze_full_2024-01-15.json"])
+
+if __name__ == "__main__":
+    unittest.main()
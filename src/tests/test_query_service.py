@@ -0,0 +1,109 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+# Se sube dos niveles desde la ubicación actual (tests/) hasta llegar a la raíz del proyecto
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.load import create_database_tables, insert_data_to_db
+from src.query_service import QueryService, QueryError, create_server
+from src.tests.helpers import build_dataframe
+
+# Construye la ruta al archivo de mock que contiene la respuesta de ejemplo
+data_path = os.path.join(os.path.dirname(__file__), 'mock_response.json')
+
+# Se abre y carga el contenido del archivo JSON en la variable SAMPLE_JSON.
+with open(data_path, 'r', encoding='utf-8') as f:
+    SAMPLE_JSON = json.load(f)
+
+
+class TestQueryService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.db")
+        create_database_tables(self.db_path)
+        insert_data_to_db(build_dataframe(SAMPLE_JSON), self.db_path)
+        self.service = QueryService(self.db_path, pool_size=2, cache_size=8)
+
+    def tearDown(self):
+        self.service.close()
+        self.tmpdir.cleanup()
+
+    def test_queries(self):
+        episodes = self.service.episodes_by_date("2024-01-01", "2024-01-31")
+        self.assertEqual([episode["id"] for episode in episodes], [2719122])
+
+        shows = self.service.shows_by_genre("drama")
+        self.assertEqual([show["id"] for show in shows], [59205])
+
+        channels = self.service.channel_stats()
+        self.assertEqual((channels[0]["name"], channels[0]["episodes"]), ("Okko", 1))
+
+        aggregations = self.service.aggregations()
+        self.assertEqual(aggregations["unique_domains"], ["okko.tv"])
+
+        with self.assertRaises(QueryError):
+            self.service.episodes_by_date("2024-01-31", "2024-01-01")
+
+    def test_cache_invalidated_when_loader_commits(self):
+        """
+        Test que verifica que los resultados se sirvan desde la caché y que esta se
+        invalide cuando el cargador confirma nuevos datos
+        """
+        self.service.episodes_by_date("2024-01-01", "2024-01-31")
+        self.service.episodes_by_date("2024-01-01", "2024-01-31")
+        self.assertEqual(self.service.cache.hits, 1)
+
+        new_episode = dict(SAMPLE_JSON[0], id=1, airdate="2024-01-05")
+        insert_data_to_db(build_dataframe([new_episode]), self.db_path)
+
+        episodes = self.service.episodes_by_date("2024-01-01", "2024-01-31")
+        self.assertEqual(len(episodes), 2)
+
+    def test_cache_ignores_result_from_before_commit(self):
+        """
+        Test que verifica que un resultado leído antes de un commit del cargador, y guardado
+        después de que otro hilo invalidara la caché, no se sirva en consultas posteriores
+        """
+        put = self.service.cache.put
+
+        def put_after_concurrent_load(key, value):
+            # Entre la lectura y el guardado en caché, el cargador confirma un episodio y
+            # otro hilo detecta el cambio y limpia la caché
+            new_episode = dict(SAMPLE_JSON[0], id=1, airdate="2024-01-05")
+            insert_data_to_db(build_dataframe([new_episode]), self.db_path)
+            self.service._invalidate_if_changed()
+            put(key, value)
+
+        with mock.patch.object(self.service.cache, "put", put_after_concurrent_load):
+            self.assertEqual(len(self.service.episodes_by_date("2024-01-01", "2024-01-31")), 1)
+
+        episodes = self.service.episodes_by_date("2024-01-01", "2024-01-31")
+        self.assertEqual(len(episodes), 2)
+
+    def test_http_endpoints(self):
+        server = create_server(self.db_path, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with urlopen(f"{base_url}/shows?genre=Comedy") as response:
+                self.assertEqual(json.loads(response.read())[0]["name"], SAMPLE_JSON[0]["_embedded"]["show"]["name"])
+
+            with self.assertRaises(HTTPError) as context:
+                urlopen(f"{base_url}/episodes?start=2024-13-01&end=2024-01-31")
+            self.assertEqual(context.exception.code, 400)
+        finally:
+            server.shutdown()
+            server.server_close()
+            server.service.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,11 @@ import json
 # Se sube dos niveles desde la ubicación actual (tests/) hasta llegar a la raíz del proyecto
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from src.transform import create_dataframe_from_json, safe_to_datetime, perform_data_cleaning
+from src.transform import (create_dataframe_from_json, create_dataframe_from_records, safe_to_datetime, perform_data_cleaning,
+                           CleaningStatsAccumulator, median_from_counts)
+from src.load import save_as_parquet_partition
+from collections import Counter
+import tempfile
 
 # Construye la ruta al archivo de mock que contiene la respuesta de ejemplo
 data_path = os.path.join(os.path.dirname(__file__), 'mock_response.json')
@@ -43,6 +47,15 @@ class TestDataTransformation(unittest.TestCase):
         full_path = os.path.join(test_dir, 'mock_response.json')
         mock_open_func.assert_called_with(full_path, 'r')
 
+    def test_create_dataframe_from_records_in_chunks(self):
+        # Los bloques con columnas distintas se unen y el origen faltante se completa como 'web'
+        records = [dict(SAMPLE_JSON[0], id=i) for i in range(5)] + [{"id": 5, "_source": "full", "extra": 1}]
+        df = create_dataframe_from_records(iter(records), chunk_size=2)
+
+        self.assertEqual(list(df['id']), list(range(6)))
+        self.assertEqual(df['_source'].tolist(), ['web'] * 5 + ['full'])
+        self.assertEqual(df['extra'].dropna().tolist(), [1])
+
     def test_safe_to_datetime(self):
         # Caso de fecha válida
         valid_date = '2024-01-02'
@@ -76,5 +89,99 @@ class TestDataTransformation(unittest.TestCase):
         # Verificar que se haya rellenado el valor numérico en 'runtime'
         self.assertEqual(df_clean['runtime'].iloc[0], 25)
 
+    def test_perform_data_cleaning_minority_source(self):
+        # 20 episodios web y 2 de cadenas de TV: las columnas de la cadena no se eliminan
+        # y los episodios de la cadena no reciben valores del canal web por la moda
+        web_records = [dict(SAMPLE_JSON[0], id=i, _source='web') for i in range(1, 21)]
+        network_show = {key: value for key, value in SAMPLE_JSON[0]['_embedded']['show'].items()
+                        if key != 'webChannel'}
+        network_show.update(id=99, webChannel=None,
+                            network={"id": 5, "name": "NBC", "officialSite": None,
+                                     "country": {"code": "US", "name": "United States",
+                                                 "timezone": "America/New_York"}})
+        network_records = [dict(SAMPLE_JSON[0], id=100 + i, _source='network',
+                                _embedded={"show": network_show}) for i in range(2)]
+        df = pd.json_normalize(web_records + network_records, sep='.')
+
+        df_clean = perform_data_cleaning(df)
+
+        self.assertIn('_embedded.show.network.id', df_clean.columns)
+        network_rows = df_clean[df_clean['_source'] == 'network']
+        self.assertEqual(len(network_rows), 2)
+        self.assertTrue((network_rows['_embedded.show.network.id'] == 5).all())
+        self.assertTrue(network_rows['_embedded.show.webchannel.name'].isnull().all())
+        self.assertTrue(network_rows['_embedded.show.webchannel.country.code'].isnull().all())
+
+    def test_median_from_counts(self):
+        # Mediana exacta a partir de histogramas con cantidad par e impar de valores
+        self.assertEqual(median_from_counts(Counter({10: 2, 30: 1})), 10.0)
+        self.assertEqual(median_from_counts(Counter({10: 1, 20: 1, 30: 1, 40: 1})), 25.0)
+
+    def test_perform_data_cleaning_with_global_stats(self):
+        # Dos ventanas: la mediana global de 'runtime' debe usarse para rellenar la segunda
+        first = pd.json_normalize(SAMPLE_JSON, sep='.')
+        second = first.copy()
+        second['id'] = 1
+        second['runtime'] = None
+        extra = first.copy()
+        extra['id'] = 2
+        extra['runtime'] = 45
+
+        accumulator = CleaningStatsAccumulator()
+        accumulator.update(pd.concat([first, extra], ignore_index=True))
+        accumulator.update(second)
+        stats = accumulator.result()
+
+        self.assertEqual(stats['medians']['runtime'], 35.0)
+        self.assertIn('rating.average', stats['cols_to_drop'])
+
+        df_clean = perform_data_cleaning(second, stats)
+        self.assertEqual(df_clean['runtime'].iloc[0], 35.0)
+        self.assertNotIn('rating.average', df_clean.columns)
+
+    def test_global_stats_drop_same_columns_as_full_cleaning(self):
+        # Limpiar las ventanas con estadísticas globales debe eliminar las mismas columnas que
+        # la limpieza del rango completo, incluidas las fechas vacías como 'airtime'
+        records = [dict(SAMPLE_JSON[0], id=i, airtime='') for i in range(1, 7)]
+        windows = [pd.json_normalize(records[:3], sep='.'), pd.json_normalize(records[3:], sep='.')]
+
+        accumulator = CleaningStatsAccumulator()
+        for window in windows:
+            accumulator.update(window)
+        stats = accumulator.result()
+
+        df_full = perform_data_cleaning(pd.json_normalize(records, sep='.'))
+        df_window = perform_data_cleaning(windows[0], stats)
+        self.assertNotIn('airtime', df_full.columns)
+        self.assertEqual(list(df_window.columns), list(df_full.columns))
+
+    def test_backfill_partitions_share_schema(self):
+        # La primera ventana solo tiene episodios web y la segunda también de cadenas de TV:
+        # ambas particiones deben tener las mismas columnas para leer el dataset completo
+        web_window = pd.json_normalize([dict(SAMPLE_JSON[0], id=i, _source='web') for i in range(1, 4)], sep='.')
+        network_show = dict(SAMPLE_JSON[0]['_embedded']['show'], id=99, webChannel=None,
+                            network={"id": 5, "name": "NBC", "officialSite": None,
+                                     "country": {"code": "US", "name": "United States",
+                                                 "timezone": "America/New_York"}})
+        mixed_window = pd.json_normalize(
+            [dict(SAMPLE_JSON[0], id=10, _source='web'),
+             dict(SAMPLE_JSON[0], id=11, _source='network', _embedded={"show": network_show})], sep='.')
+
+        accumulator = CleaningStatsAccumulator()
+        accumulator.update(web_window)
+        accumulator.update(mixed_window)
+        stats = accumulator.result()
+
+        cleaned = [perform_data_cleaning(window, stats) for window in (web_window, mixed_window)]
+        self.assertEqual(list(cleaned[0].columns), list(cleaned[1].columns))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            save_as_parquet_partition(cleaned[0], tmpdir, "2024-01-01")
+            save_as_parquet_partition(cleaned[1], tmpdir, "2024-01-08")
+            dataset = pd.read_parquet(tmpdir)
+
+        self.assertEqual(len(dataset), 5)
+        self.assertEqual(dataset['_embedded.show.network.name'].dropna().tolist(), ['NBC'])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -2,23 +2,77 @@ import os
 import json
 import pandas as pd
 import logging
-from bs4 import BeautifulSoup
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+# Columna con el endpoint de origen de cada episodio ('web', 'network' o 'full')
+SOURCE_COLUMN = '_source'
+
+# Parámetros de limpieza compartidos por perform_data_cleaning y CleaningStatsAccumulator
+DATE_COLUMNS = ['airdate', 'airtime', 'airstamp', '_embedded.show.premiered', '_embedded.show.ended']
+NUMERIC_COLUMNS = ['runtime', '_embedded.show.averageruntime']
+MISSING_THRESHOLD = 0.85
+TYPE_FREQUENCY_THRESHOLD = 10
+
+# Columnas propias de un origen: el canal web solo existe en episodios web y la cadena de TV
+# solo en episodios de /schedule. Sus faltantes dependen de la mezcla de orígenes, por lo que
+# no se eliminan por porcentaje de faltantes ni se rellenan con la moda
+SOURCE_SPECIFIC_PREFIXES = ('_embedded.show.webchannel.', '_embedded.show.network.')
+
+def is_source_specific(column: str) -> bool:
+    """Indica si la columna pertenece solo a los episodios de un origen (web o cadena de TV)"""
+    return column.startswith(SOURCE_SPECIFIC_PREFIXES)
+
 def create_dataframe_from_json(json_folder: str) -> pd.DataFrame:
     """
     Lee todos los archivos JSON (raw_data) que se extrajeron de la API de TVMaze y,
     los concatena en un Dataframe de Pandas
     """
     all_files = [os.path.join(json_folder, file) for file in os.listdir(json_folder) if file.endswith(".json")]
+    return create_dataframe_from_json_files(all_files)
+
+def create_dataframe_from_json_files(files) -> pd.DataFrame:
+    """
+    Lee los archivos JSON recibidos y los concatena en un DataFrame de Pandas.
+    Permite construir el DataFrame de solo una ventana de fechas (modo backfill).
+    """
     all_data = []
-    for file in all_files:
+    for file in files:
         with open(file, 'r') as f:
             data = json.load(f)
             all_data.extend(data)
 
-    df = pd.json_normalize(all_data, sep='.')
+    return tag_default_source(pd.json_normalize(all_data, sep='.'))
+
+def create_dataframe_from_records(records, chunk_size: int = 10000) -> pd.DataFrame:
+    """
+    Construye el DataFrame a partir de un iterable de registros (por ejemplo, los leídos de
+    forma incremental de /schedule/full), normalizándolos por bloques de 'chunk_size' para
+    no mantener a la vez todos los registros y el DataFrame en memoria.
+    """
+    chunks, chunk = [], []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            chunks.append(pd.json_normalize(chunk, sep='.'))
+            chunk = []
+    if chunk or not chunks:
+        chunks.append(pd.json_normalize(chunk, sep='.'))
+
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    return tag_default_source(df)
+
+def tag_default_source(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Completa la columna de origen: los archivos extraídos antes de etiquetar el origen
+    corresponden a /schedule/web
+    """
+    if not df.empty:
+        if SOURCE_COLUMN not in df.columns:
+            df[SOURCE_COLUMN] = 'web'
+        else:
+            df[SOURCE_COLUMN] = df[SOURCE_COLUMN].fillna('web')
     return df
 
 def safe_to_datetime(column):
@@ -31,28 +85,44 @@ def safe_to_datetime(column):
     except Exception:
         return pd.NaT
 
-def perform_data_cleaning(df):
+def perform_data_cleaning(df, stats=None):
+    """
+    Limpia y estandariza el DataFrame de episodios. Si se recibe 'stats' (resultado de
+    CleaningStatsAccumulator), las columnas a eliminar, medianas, modas y frecuencias de
+    'type' se toman de esas estadísticas globales en lugar de calcularse sobre el DataFrame,
+    de modo que cada ventana de un backfill se limpie igual que el rango completo. Además,
+    cada ventana se reindexa al conjunto global de columnas para que todas las particiones
+    Parquet compartan el mismo esquema.
+    """
     # Copia del DataFrame original
     df_clean = df.copy()
 
     # Estandarizar nombres de columnas
     df_clean.columns = [col.strip().lower() for col in df_clean.columns]
 
+    # Usar el conjunto global de columnas (las ausentes en la ventana quedan como faltantes);
+    # las de 'cols_to_drop' se eliminan más adelante, como en la limpieza sin estadísticas
+    if stats is not None:
+        df_clean = df_clean.reindex(columns=stats['columns'])
+
     # Estandarizar fechas
-    date_columns = ['airdate', 'airtime', 'airstamp', '_embedded.show.premiered', '_embedded.show.ended']
-    for col in date_columns:
+    for col in DATE_COLUMNS:
         if col in df_clean.columns:
             df_clean[col] = safe_to_datetime(df_clean[col])
 
     # Limpiar texto HTML (para facilitar el análisis de texto)
+    from bs4 import BeautifulSoup  # Importación diferida: solo la necesita la limpieza
     df_clean['summary'] = df_clean['summary'].apply(
         lambda x: BeautifulSoup(x, "html.parser").get_text() if isinstance(x, str) else x)
 
     # Eliminar columnas con más del 85% de datos faltantes
-    total_rows = len(df_clean)
-    missing_threshold = 0.85
-    cols_to_drop = [col for col in df_clean.columns
-                    if df_clean[col].isnull().sum() / total_rows >= missing_threshold]
+    if stats is not None:
+        cols_to_drop = [col for col in df_clean.columns if col in stats['cols_to_drop']]
+    else:
+        total_rows = len(df_clean)
+        cols_to_drop = [col for col in df_clean.columns
+                        if not is_source_specific(col)
+                        and df_clean[col].isnull().sum() / total_rows >= MISSING_THRESHOLD]
     df_clean = df_clean.drop(columns=cols_to_drop)
 
     # Filtrar registros con 'season' 2024
@@ -60,16 +130,23 @@ def perform_data_cleaning(df):
         df_clean = df_clean[df_clean['season'] != 2024]
 
     # Rellenar valores numéricos con la mediana
-    numeric_columns = ['runtime', '_embedded.show.averageruntime']
-    for column in numeric_columns:
+    for column in NUMERIC_COLUMNS:
         if column in df_clean.columns and df_clean[column].isnull().any():
-            df_clean[column] = df_clean[column].fillna(df_clean[column].median())
+            median_value = stats['medians'].get(column) if stats is not None else df_clean[column].median()
+            df_clean[column] = df_clean[column].fillna(median_value)
 
     # Rellenar valores categóricos con la moda
-    categorical_cols = df_clean.select_dtypes(include=['object']).columns
+    categorical_cols = list(df_clean.select_dtypes(include=['object']).columns)
+    if stats is not None:
+        # Las columnas ausentes en la ventana no son de tipo object, pero sí categóricas globalmente
+        categorical_cols += [col for col in stats['modes'] if col in df_clean.columns and col not in categorical_cols]
+    categorical_cols = [col for col in categorical_cols if not is_source_specific(col)]
     for column in categorical_cols:
         if df_clean[column].isnull().any():
-            mode_value = df_clean[column].mode().iloc[0] if not df_clean[column].mode().empty else 'unknown'
+            if stats is not None:
+                mode_value = stats['modes'].get(column, 'unknown')
+            else:
+                mode_value = df_clean[column].mode().iloc[0] if not df_clean[column].mode().empty else 'unknown'
             df_clean[column] = df_clean[column].fillna(mode_value)
 
     # Convertir listas en cadenas separadas por comas
@@ -94,10 +171,9 @@ def perform_data_cleaning(df):
 
     # Normalizar categorías poco frecuentes en 'type'
     if 'type' in df_clean.columns:
-        threshold = 10
-        type_counts = df_clean['type'].value_counts()
+        type_counts = stats['type_counts'] if stats is not None else df_clean['type'].value_counts()
         df_clean['type'] = df_clean['type'].apply(
-            lambda x: 'other' if type_counts.get(x, 0) <= threshold else x
+            lambda x: 'other' if type_counts.get(x, 0) <= TYPE_FREQUENCY_THRESHOLD else x
         )
 
     # Eliminar filas con menos del 25% de datos
@@ -108,4 +184,126 @@ def perform_data_cleaning(df):
     df_clean.drop_duplicates(inplace=True)
     df_clean.reset_index(drop=True, inplace=True)
 
+    # Columnas de texto sin valores en esta ventana: se usa un tipo string para que el
+    # esquema Parquet coincida con el de las ventanas donde sí tienen valores
+    if stats is not None:
+        for column in stats['string_columns']:
+            if column in df_clean.columns and df_clean[column].isnull().all():
+                df_clean[column] = df_clean[column].astype(pd.StringDtype())
+
     return df_clean
+
+
+class CleaningStatsAccumulator:
+    """
+    Calcula en una primera pasada, ventana por ventana, las estadísticas globales que
+    necesita perform_data_cleaning sin mantener todo el rango de fechas en memoria:
+    porcentaje de faltantes por columna, medianas (histogramas exactos de valores),
+    modas (sketch Misra-Gries: exactas hasta 'mode_capacity' valores distintos por
+    columna y aproximadas por encima) y la frecuencia de cada 'type'.
+    """
+
+    def __init__(self, mode_capacity: int = 1000):
+        self.mode_capacity = mode_capacity
+        self.total_rows = 0
+        self.non_null_counts = Counter()
+        self.numeric_counts = {column: Counter() for column in NUMERIC_COLUMNS}
+        self.mode_sketches = {}
+        self.type_counts = Counter()
+        # Columnas vistas en orden de aparición, indicando si contienen texto
+        self.columns = {}
+
+    def update(self, df: pd.DataFrame):
+        """Acumula las estadísticas de una ventana (DataFrame sin limpiar)"""
+        if df.empty:
+            return
+        df = df.copy()
+        df.columns = [col.strip().lower() for col in df.columns]
+
+        # Las fechas se convierten como en perform_data_cleaning antes de contar faltantes:
+        # los valores no convertibles (p. ej. 'airtime' vacío) cuentan como faltantes
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                df[col] = safe_to_datetime(df[col])
+
+        # Faltantes: una columna ausente en la ventana cuenta como faltante en todas sus filas
+        self.total_rows += len(df)
+        self.non_null_counts.update(df.notnull().sum().to_dict())
+        for column in df.columns:
+            if not self.columns.get(column):
+                self.columns[column] = bool(df[column].map(lambda x: isinstance(x, str)).any())
+
+        # Las medianas, modas y frecuencias se calculan después del filtro de 'season'
+        if 'season' in df.columns:
+            df = df[df['season'] != 2024]
+
+        for column in NUMERIC_COLUMNS:
+            if column in df.columns:
+                self.numeric_counts[column].update(df[column].dropna().value_counts().to_dict())
+
+        categorical_cols = df.drop(columns=[col for col in DATE_COLUMNS if col in df.columns]) \
+            .select_dtypes(include=['object']).columns
+        for column in categorical_cols:
+            values = df[column].dropna()
+            values = values[values.map(lambda x: not isinstance(x, (list, dict)))]
+            sketch = self.mode_sketches.setdefault(column, Counter())
+            sketch.update(values.value_counts().to_dict())
+            self._prune(sketch)
+
+        if 'type' in df.columns:
+            self.type_counts.update(df['type'].dropna().value_counts().to_dict())
+
+    def _prune(self, sketch: Counter):
+        """Reducción Misra-Gries: conserva como máximo 'mode_capacity' candidatos"""
+        if len(sketch) <= self.mode_capacity:
+            return
+        cutoff = sorted(sketch.values(), reverse=True)[self.mode_capacity]
+        for value in list(sketch):
+            sketch[value] -= cutoff
+            if sketch[value] <= 0:
+                del sketch[value]
+
+    def result(self) -> dict:
+        """Retorna las estadísticas globales en el formato que recibe perform_data_cleaning"""
+        cols_to_drop = {column for column, count in self.non_null_counts.items()
+                        if not is_source_specific(column)
+                        and self.total_rows and 1 - count / self.total_rows >= MISSING_THRESHOLD}
+
+        medians = {column: median_from_counts(counts)
+                   for column, counts in self.numeric_counts.items() if counts}
+
+        modes = {}
+        for column, sketch in self.mode_sketches.items():
+            if sketch:
+                # En caso de empate se elige el menor valor, como pandas.Series.mode
+                top = max(sketch.values())
+                mode_value = min(value for value, count in sketch.items() if count == top)
+                if column == 'summary':
+                    from bs4 import BeautifulSoup
+                    mode_value = BeautifulSoup(mode_value, "html.parser").get_text()
+                modes[column] = mode_value
+
+        return {
+            'columns': list(self.columns),
+            'string_columns': {column for column, has_text in self.columns.items() if has_text},
+            'cols_to_drop': cols_to_drop,
+            'medians': medians,
+            'modes': modes,
+            'type_counts': dict(self.type_counts),
+        }
+
+
+def median_from_counts(counts: Counter) -> float:
+    """
+    Calcula la mediana exacta a partir de un histograma {valor: frecuencia}.
+    """
+    total = sum(counts.values())
+    middle = [(total - 1) // 2, total // 2]
+    result = []
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        while middle and middle[0] < seen:
+            result.append(value)
+            middle.pop(0)
+    return float(sum(result) / len(result))